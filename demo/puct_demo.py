@@ -2,7 +2,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 from pmcts.planners import ParetoUCT
-from demo.pgm2numpy import read_pgm
+from pmcts.maps import load_occupancy
 
 plt.rcParams["image.origin"] = "lower"
 plt.rcParams["image.cmap"] = "gray_r"
@@ -15,13 +15,11 @@ print("Environment extent: ", extent)
 pose = np.array([90, 20, -np.pi / 2])
 print(f"Robot's pose: [x={pose[0]}, y={pose[1]}, yaw={pose[2]}]")
 
-# Read occupancy grid map from pgm file
-occupancy_grid_map = read_pgm("./maps/cave.pgm", byteorder="<")
-# Normalize the occupancy grid map.
-occupancy_grid_map = (occupancy_grid_map -
-                      occupancy_grid_map.min()) / occupancy_grid_map.max()
-# Occupancy grid map is now a boolean matrix with 1 indicating occupied.
-occupancy_grid_map = occupancy_grid_map < 0.9
+# Read occupancy grid map from pgm file.
+# Normalized gray values below 0.9 are occupied. The map is bit-packed and
+# indexed without unpacking.
+occupancy_grid_map = load_occupancy("./maps/cave.pgm", threshold=0.9,
+                                    byteorder="<")
 assert occupancy_grid_map.dtype == bool
 
 # Create an artificial reward map
@@ -72,7 +70,7 @@ print("Green dots demonstrate the searching tree.")
 
 # Visualization
 fig, axes = plt.subplots(1, 3, figsize=(12, 4))
-ogm = axes[0].imshow(occupancy_grid_map, extent=extent)
+ogm = axes[0].imshow(np.asarray(occupancy_grid_map), extent=extent)
 axes[0].quiver(
     poses[:, 0],
     poses[:, 1],
@@ -0,0 +1,48 @@
+import timeit
+import numpy as np
+from pmcts.planners import UCT, ParetoUCT
+from pmcts.planners.uct import Node
+
+# Time the plain-Python and the NumPy selection kernels on a node with a
+# growing number of children. The crossover is the smallest branching factor
+# from which the NumPy kernel is faster.
+params = dict(extent=[0, 100, 0, 100], angle_range=[-np.pi / 4, np.pi / 4],
+              velocity=1.0, num_actions=5, duration=5, weight=0.1,
+              max_iter=2000, max_rollout=50)
+branching_factors = [1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64, 96, 128]
+rng = np.random.RandomState(0)
+
+
+def make_node(num_children, num_objectives):
+    node = Node(np.zeros(3), 0)
+    for _ in range(num_children):
+        reward = rng.rand(num_objectives) if num_objectives > 1 else rng.rand()
+        child = Node(np.zeros(3), 0, reward * 10, parent=node)
+        child.num_visits = rng.randint(1, 100)
+        node.add_child(child)
+        node.num_visits += child.num_visits
+    return node
+
+
+def crossover(name, scalar, vectorized, num_objectives):
+    print(f"{name}: time per selection in microseconds")
+    print(f"{'children':>8} {'math':>8} {'numpy':>8}")
+    found = None
+    for num_children in branching_factors:
+        node = make_node(num_children, num_objectives)
+        number = 2000
+        t_scalar = min(timeit.repeat(lambda: scalar(node), number=number,
+                                     repeat=5)) / number * 1e6
+        t_vectorized = min(timeit.repeat(lambda: vectorized(node),
+                                         number=number, repeat=5)) / number * 1e6
+        print(f"{num_children:>8} {t_scalar:8.2f} {t_vectorized:8.2f}")
+        if found is None and t_vectorized < t_scalar:
+            found = num_children
+    print(f"NumPy is faster from {found} children on\n")
+
+
+uct = UCT(**params)
+crossover("UCT", uct.select_child_scalar, uct.select_child_vectorized, 1)
+puct = ParetoUCT(**params)
+crossover("ParetoUCT", puct.pareto_front_scalar,
+          puct.pareto_front_vectorized, 2)
@@ -0,0 +1,29 @@
+import numpy as np
+from pmcts.experiments import (cave_scenario, hotspots_scenario,
+                               random_scenario, run_sweep)
+
+# Scenarios: the cave map of the demos, the hotspots of hotspots.py and a
+# few random maps.
+scenarios = [cave_scenario("./maps/cave.pgm"), hotspots_scenario()]
+scenarios += [random_scenario(seed) for seed in range(3)]
+
+# Parameters to sweep. The others keep the values of the demos.
+grid = {
+    "weight": [0.1, 0.3, 1.0],
+    "max_iter": [250, 1000],
+}
+
+results = run_sweep(["uct"], grid, scenarios, num_steps=20,
+                    filename="sweep_results.npz")
+print("Results are saved in sweep_results.npz")
+
+for scenario in np.unique(results["scenario"]):
+    for weight in grid["weight"]:
+        for max_iter in grid["max_iter"]:
+            rows = ((results["scenario"] == scenario)
+                    & (results["weight"] == weight)
+                    & (results["max_iter"] == max_iter))
+            print(f"{scenario:>10} weight={weight:<4} max_iter={max_iter:<5}"
+                  f" reward={results['reward'][rows].sum():7.2f}"
+                  f" latency={results['latency'][rows].mean() * 1e3:6.1f} ms"
+                  f" it/s={results['iterations_per_second'][rows].mean():7.0f}")
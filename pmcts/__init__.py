@@ -1,3 +1,5 @@
 from . import planners
 from . import actions
 from . import dynamics
+from . import maps
+from . import experiments
@@ -11,25 +11,43 @@ class DiscreteActions:
     Each action consists of a series of configurations.
     """
 
-    def __init__(self, angle_range, num_actions, duration, velocity=1.0):
+    def __init__(self,
+                 angle_range,
+                 num_actions,
+                 duration,
+                 velocity=1.0,
+                 dtype=np.float64):
         assert len(angle_range) == 2
         self.angle_range = angle_range
         self.num_actions = num_actions
         self.duration = duration
-        self.control_inputs = np.linspace(angle_range[0], angle_range[1], num_actions)
-        dynamics = Dubins(velocity)
+        self.dtype = np.dtype(dtype)
+        self.control_inputs = np.linspace(angle_range[0],
+                                          angle_range[1],
+                                          num_actions,
+                                          dtype=self.dtype)
+        self.dynamics = Dubins(velocity)
+        self.build_actions()
+
+    @property
+    def velocity(self):
+        return self.dynamics.velocity
+
+    @velocity.setter
+    def velocity(self, v):
+        """
+        Changing the velocity re-generates the primitive actions.
+        """
+        self.dynamics.velocity = v
+        self.build_actions()
+
+    def build_actions(self):
         # Pre-computed primitive actions
-        actions = []
-        for action_idx in range(num_actions):
-            pose = np.zeros(3)
-            action = [pose]
-            for _ in range(duration):
-                pose = dynamics.steering(pose, self.control_inputs[action_idx])
-                action.append(pose)
-            actions.append(action)
-        self.actions = np.asarray(actions)
-        assert self.actions.shape[0] == num_actions
-        assert self.actions.shape[1] == duration + 1
+        self.actions = self.dynamics.steering_batch(
+            np.zeros(3, dtype=self.dtype), self.control_inputs,
+            self.duration)[0]
+        assert self.actions.shape[0] == self.num_actions
+        assert self.actions.shape[1] == self.duration + 1
         assert self.actions.shape[2] == 3
 
     def get_action(self, pose, action_idx):
@@ -37,7 +55,7 @@ class DiscreteActions:
         action = self.actions[action_idx]
 
         # Rotation
-        rotation_mat = rotation(pose[2])
+        rotation_mat = rotation(pose[2], self.dtype)
         action = np.matmul(action, rotation_mat)
         action[:, 2] = (action[:, 2] + pose[2]) % (2 * np.pi)
 
@@ -45,3 +63,37 @@ class DiscreteActions:
         action[:, 0] += pose[0]
         action[:, 1] += pose[1]
         return action
+
+    def get_actions(self, pose, action_indices=None):
+        """
+        Transform several primitive actions to the given pose at once.
+
+        :return: actions of shape (len(action_indices), duration + 1, 3)
+        """
+        assert pose.ndim == 1
+        actions = self.actions
+        if action_indices is not None:
+            actions = actions[action_indices]
+        actions = np.matmul(actions, rotation(pose[2], self.dtype))
+        actions[..., 2] = (actions[..., 2] + pose[2]) % (2 * np.pi)
+        actions[..., 0] += pose[0]
+        actions[..., 1] += pose[1]
+        return actions
+
+    def repeat_action(self, pose, action_idx, num_repeats):
+        """
+        Execute the same primitive action `num_repeats` times in a row.
+
+        The poses are simulated in one call to the dynamics. As with chained
+        calls to `get_action`, every action starts with the last pose of the
+        previous one.
+
+        :return: poses of shape (num_repeats * (duration + 1), 3)
+        """
+        trajectory = self.dynamics.steering_batch(
+            pose.astype(self.dtype, copy=False),
+            self.control_inputs[action_idx:action_idx + 1],
+            num_repeats * self.duration)[0, 0]
+        starts = np.arange(num_repeats)[:, None] * self.duration
+        indices = starts + np.arange(self.duration + 1)
+        return trajectory[indices.ravel()]
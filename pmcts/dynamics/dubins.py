@@ -45,3 +45,51 @@ class Dubins:
         new_pose[1] = self.velocity * np.sin(pose[2]) + pose[1]
         new_pose[2] = (pose[2] + angle) % (2 * np.pi)
         return new_pose
+
+    def steering_batch(self, poses, angles, num_steps):
+        r"""
+        Steer many poses with many constant steering angles for many steps.
+
+        The trajectory is computed in closed form, so the cost does not
+        depend on a Python loop over poses, angles or steps. Applying
+        `steering` `num_steps` times gives the same poses up to rounding.
+
+        :param poses: initial poses [$x_1$, $x_2$, $\theta$] of shape (3,)
+            or (num_poses, 3)
+        :type poses: numpy.ndarray
+        :param angles: steering angles of shape (num_angles,)
+        :type angles: numpy.ndarray
+        :param num_steps: number of steering steps
+        :type num_steps: int
+        :return: poses of shape (num_poses, num_angles, num_steps + 1, 3),
+            where the first step is the initial pose
+        :rtype: numpy.ndarray
+        """
+        poses = np.atleast_2d(poses)
+        angles = np.atleast_1d(angles)
+        assert poses.shape[1] == 3
+        assert np.all(np.abs(angles) <= np.pi)
+        dtype = np.result_type(poses.dtype, angles.dtype, np.float32)
+        steps = np.arange(num_steps + 1, dtype=dtype)
+        theta = poses[:, None, None, 2]
+        angle = angles[None, :, None]
+        # Sum of cos(theta + m * angle) over m < k in closed form, with the
+        # limit k * cos(theta) for (nearly) straight motion.
+        half = 0.5 * angle
+        sin_half = np.sin(half)
+        straight = np.abs(sin_half) < 1e-9
+        scale = np.where(
+            straight,
+            steps,
+            np.sin(steps * half) / np.where(straight, 1.0, sin_half),
+        )
+        mid = theta + (steps - 1) * half
+        trajectory = np.empty(
+            (poses.shape[0], angles.shape[0], num_steps + 1, 3), dtype=dtype)
+        trajectory[..., 0] = poses[:, None, None, 0] + \
+            self.velocity * scale * np.cos(mid)
+        trajectory[..., 1] = poses[:, None, None, 1] + \
+            self.velocity * scale * np.sin(mid)
+        trajectory[..., 2] = (theta + steps * angle) % (2 * np.pi)
+        trajectory[..., 0, 2] = poses[:, None, 2]
+        return trajectory
@@ -0,0 +1,3 @@
+from .scenarios import (Scenario, cave_scenario, hotspots_scenario,
+                        random_scenario)
+from .runner import run_episode, run_sweep, load_results
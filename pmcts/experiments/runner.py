@@ -0,0 +1,148 @@
+"""
+Closed-loop parameter sweeps over planners and scenarios.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+import time
+import numpy as np
+
+from ..planners import UCT, ParetoUCT, ScalarizedEnsemble
+from ..utilities.indexing import xy_to_ij
+
+PLANNERS = {"uct": UCT, "puct": ParetoUCT, "ensemble": ScalarizedEnsemble}
+
+# Parameters of the demos
+DEFAULT_PARAMS = dict(
+    angle_range=[-0.1, 0.1],
+    velocity=1.0,
+    num_actions=5,
+    duration=10,
+    weight=0.3,
+    max_iter=1000,
+    max_rollout=5,
+)
+
+
+def run_episode(planner, params, scenario, num_steps):
+    """
+    Receding-horizon episode executing the first action of every plan.
+
+    :param planner: key of `PLANNERS`
+    :type planner: str
+    :param params: planner parameters overriding `DEFAULT_PARAMS`
+    :type params: dict
+    :param scenario: map and initial pose
+    :type scenario: Scenario
+    :param num_steps: number of planning steps
+    :type num_steps: int
+    :return: per-step planning latency in seconds, collected reward,
+        number of search iterations and iterations per second
+    :rtype: dict
+    """
+    kwargs = dict(DEFAULT_PARAMS, **params)
+    uct = PLANNERS[planner](scenario.extent, **kwargs)
+    reward_map = scenario.reward_map
+    max_row = reward_map.shape[0] - 1
+    max_col = reward_map.shape[1] - 1
+    pose = scenario.pose.copy()
+    steps = dict(latency=[], reward=[], iterations=[], iterations_per_second=[])
+    for _ in range(num_steps):
+        start = time.perf_counter()
+        action = uct.search(pose, reward_map, scenario.occupancy_map)
+        latency = time.perf_counter() - start
+        # The first pose of the action is the current pose.
+        ij = xy_to_ij(action[1:, :2], scenario.extent, max_row, max_col)
+        steps["latency"].append(latency)
+        steps["reward"].append(float(np.sum(reward_map[ij[:, 0], ij[:, 1]])))
+        steps["iterations"].append(uct.num_iterations)
+        steps["iterations_per_second"].append(uct.num_iterations / latency)
+        pose = action[-1].copy()
+    if hasattr(uct, "close"):
+        uct.close()
+    return steps
+
+
+def _run_job(job):
+    planner, params, scenario, num_steps = job
+    return run_episode(planner, params, scenario, num_steps)
+
+
+def parameter_grid(grid):
+    """
+    All combinations of the values in a dictionary of parameter lists.
+    """
+    names = sorted(grid)
+    return [
+        dict(zip(names, values))
+        for values in product(*(grid[name] for name in names))
+    ]
+
+
+def run_sweep(planners,
+              grid,
+              scenarios,
+              num_steps,
+              num_episodes=1,
+              num_workers=None,
+              filename=None):
+    """
+    Run closed-loop episodes for every planner, parameter combination and
+    scenario across a process pool.
+
+    The results are columnar: every column is an array with one entry per
+    planning step. They are written to `filename` with `numpy.savez` and
+    can be read back with `load_results`.
+
+    :param planners: keys of `PLANNERS`, or pairs of a key and a dictionary
+        of parameters only passed to that planner
+    :type planners: list
+    :param grid: lists of values of the swept planner parameters
+    :type grid: dict
+    :param scenarios: scenarios to plan in
+    :type scenarios: list
+    :param num_steps: number of planning steps per episode
+    :type num_steps: int
+    :param num_episodes: number of repeated episodes, defaults to 1
+    :type num_episodes: int, optional
+    :param num_workers: number of processes, 0 runs in this process,
+        defaults to the number of CPUs
+    :type num_workers: int, optional
+    :param filename: path of the `.npz` results file, optional
+    :type filename: str, optional
+    :rtype: dict
+    """
+    planners = [(planner, {}) if isinstance(planner, str) else planner
+                for planner in planners]
+    configs = [(planner, params, scenario, episode)
+               for planner in planners for params in parameter_grid(grid)
+               for scenario in scenarios for episode in range(num_episodes)]
+    jobs = [(planner, dict(planner_params, **params), scenario, num_steps)
+            for (planner, planner_params), params, scenario, _ in configs]
+    if num_workers == 0:
+        results = map(_run_job, jobs)
+    else:
+        with ProcessPoolExecutor(num_workers) as executor:
+            results = list(executor.map(_run_job, jobs))
+
+    columns = dict(planner=[], scenario=[], episode=[], step=[])
+    columns.update({name: [] for name in grid})
+    for ((planner, _), params, scenario, episode), steps in zip(configs,
+                                                                 results):
+        num_rows = len(steps["latency"])
+        columns["planner"] += [planner] * num_rows
+        columns["scenario"] += [scenario.name] * num_rows
+        columns["episode"] += [episode] * num_rows
+        columns["step"] += list(range(num_rows))
+        for name in grid:
+            columns[name] += [params[name]] * num_rows
+        for name, values in steps.items():
+            columns.setdefault(name, []).extend(values)
+    columns = {name: np.asarray(values) for name, values in columns.items()}
+    if filename is not None:
+        np.savez(filename, **columns)
+    return columns
+
+
+def load_results(filename):
+    with np.load(filename) as data:
+        return {name: data[name] for name in data.files}
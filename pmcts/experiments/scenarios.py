@@ -0,0 +1,125 @@
+"""
+Planning scenarios used by the experiment runner.
+"""
+from collections import namedtuple
+import numpy as np
+
+from ..maps import load_occupancy
+
+Scenario = namedtuple("Scenario",
+                      ["name", "extent", "pose", "reward_map", "occupancy_map"])
+
+
+def normalize(reward_map):
+    # Same normalization as in the demos
+    reward_map = (reward_map - reward_map.min()) / reward_map.max()
+    return reward_map.astype(np.float32)
+
+
+def gaussian_mixture(shape, means, covariances):
+    """
+    Sum of bivariate Gaussian densities evaluated at every cell (i, j).
+    """
+    i, j = np.indices(shape)
+    cells = np.stack([i, j], axis=-1).astype(float)
+    density = np.zeros(shape)
+    for mean, covariance in zip(means, covariances):
+        covariance = np.asarray(covariance, dtype=float)
+        diff = cells - np.asarray(mean, dtype=float)
+        precision = np.linalg.inv(covariance)
+        mahalanobis = np.einsum("...i,ij,...j->...", diff, precision, diff)
+        density += np.exp(-0.5 * mahalanobis) / (
+            2.0 * np.pi * np.sqrt(np.linalg.det(covariance)))
+    return density
+
+
+def cave_scenario(pgm_filename, num_objectives=1, threshold=0.9):
+    """
+    Cave map of the UCT and Pareto UCT demos with their artificial rewards.
+    """
+    occupancy_map = load_occupancy(pgm_filename, threshold, byteorder="<")
+    rows, cols = occupancy_map.shape
+    i = np.arange(rows, dtype=float)[:, None]
+    j = np.arange(cols, dtype=float)[None, :]
+    objectives = [i * j, np.broadcast_to(i**2, (rows, cols))]
+    if num_objectives == 1:
+        reward_map = objectives[0]
+    else:
+        assert num_objectives == 2
+        reward_map = np.dstack(objectives)
+    return Scenario(
+        f"cave{num_objectives}",
+        [0, 100, 0, 100],
+        np.array([90.0, 20.0, -np.pi / 2]),
+        normalize(reward_map),
+        occupancy_map,
+    )
+
+
+def hotspots_scenario():
+    """
+    Free space with the three Gaussian hotspots of the hotspots demo.
+    """
+    reward_map = gaussian_mixture(
+        (100, 100),
+        means=[[80, 50], [50, 50], [20, 50]],
+        covariances=[
+            [[100, 70], [70, 100]],
+            [[100, -70], [-70, 100]],
+            [[100, 70], [70, 100]],
+        ],
+    )
+    return Scenario(
+        "hotspots",
+        [0, 100, 0, 100],
+        np.array([90.0, 20.0, -np.pi / 2]),
+        normalize(reward_map),
+        np.zeros(reward_map.shape, dtype=bool),
+    )
+
+
+def random_scenario(seed,
+                    size=100,
+                    num_obstacles=15,
+                    max_obstacle_size=10,
+                    num_hotspots=4,
+                    num_objectives=1):
+    """
+    Random rectangular obstacles and random Gaussian hotspots.
+
+    The robot starts at the center of the map, which is kept free.
+    """
+    rng = np.random.RandomState(seed)
+    # Rectangles are the outer product of row and column intervals.
+    centers = rng.randint(0, size, size=(num_obstacles, 2))
+    half_sizes = rng.randint(1, max_obstacle_size // 2 + 1,
+                             size=(num_obstacles, 2))
+    cells = np.arange(size)
+    rows = np.abs(cells[None, :] - centers[:, :1]) <= half_sizes[:, :1]
+    cols = np.abs(cells[None, :] - centers[:, 1:]) <= half_sizes[:, 1:]
+    occupancy_map = np.any(rows[:, :, None] & cols[:, None, :], axis=0)
+    i, j = np.indices((size, size))
+    center = size / 2
+    free = (i - center)**2 + (j - center)**2 <= max_obstacle_size**2
+    occupancy_map[free] = False
+
+    objectives = []
+    for _ in range(num_objectives):
+        variances = rng.uniform(size, 4 * size, size=(num_hotspots, 2))
+        correlations = rng.uniform(-0.7, 0.7, size=num_hotspots)
+        covariances = [[
+            [vi, rho * np.sqrt(vi * vj)],
+            [rho * np.sqrt(vi * vj), vj],
+        ] for (vi, vj), rho in zip(variances, correlations)]
+        means = rng.uniform(0, size, size=(num_hotspots, 2))
+        objectives.append(
+            gaussian_mixture((size, size), means, covariances))
+    reward_map = objectives[0] if num_objectives == 1 else np.dstack(
+        objectives)
+    return Scenario(
+        f"random{seed}",
+        [0, size, 0, size],
+        np.array([center, center, rng.uniform(0, 2 * np.pi)]),
+        normalize(reward_map),
+        occupancy_map,
+    )
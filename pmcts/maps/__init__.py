@@ -0,0 +1,4 @@
+from .pgm import (PackedOccupancy, read_pgm, read_pgm_header, load_occupancy,
+                  save_reward_map, load_reward_map)
+from .pyramid import MapPyramid
+from .tiled import TiledMap, save_tiles
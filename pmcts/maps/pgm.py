@@ -0,0 +1,217 @@
+"""
+Memory-mapped loading of PGM occupancy grid maps and cached reward maps.
+"""
+import json
+import os
+import re
+import numpy as np
+
+_PGM_HEADER = re.compile(
+    rb"(^P5\s(?:\s*#.*[\r\n])*"
+    rb"(\d+)\s(?:\s*#.*[\r\n])*"
+    rb"(\d+)\s(?:\s*#.*[\r\n])*"
+    rb"(\d+)\s(?:\s*#.*[\r\n]\s)*)"
+)
+
+
+def read_pgm_header(filename, chunk_size=1024):
+    """
+    Parse the header of a raw PGM file without reading the image data.
+
+    Format specification: http://netpbm.sourceforge.net/doc/pgm.html
+
+    :param filename: path to the PGM file
+    :type filename: str
+    :return: header length in bytes, height, width and maximum gray value
+    :rtype: tuple
+    """
+    buffer = b""
+    with open(filename, "rb") as f:
+        while True:
+            data = f.read(chunk_size)
+            buffer += data
+            match = _PGM_HEADER.search(buffer)
+            # The pattern only matches once every field has been terminated,
+            # so a partially read header never produces a false match.
+            if match is not None:
+                header, width, height, maxval = match.groups()
+                return len(header), int(height), int(width), int(maxval)
+            if not data or len(buffer) > 64 * chunk_size:
+                raise ValueError("Not a raw PGM file: '%s'" % filename)
+
+
+def read_pgm(filename, byteorder=">"):
+    """
+    Return image data from a raw PGM file as a read-only memory-mapped array.
+
+    The header parsing follows the snippet in
+    https://stackoverflow.com/questions/7368739/numpy-and-16-bit-pgm
+
+    :param filename: path to the PGM file
+    :type filename: str
+    :param byteorder: byte order of 16-bit images, defaults to ">"
+    :type byteorder: str, optional
+    :rtype: numpy.memmap
+    """
+    offset, height, width, maxval = read_pgm_header(filename)
+    return np.memmap(
+        filename,
+        dtype="u1" if maxval < 256 else byteorder + "u2",
+        mode="r",
+        offset=offset,
+        shape=(height, width),
+    )
+
+
+class PackedOccupancy:
+    """
+    Boolean occupancy grid map stored with one bit per cell.
+
+    Rows are packed with `numpy.packbits` along the column axis. Indexing
+    with a pair of index arrays gathers single bits, so the planner can
+    query the map without ever unpacking it.
+
+    :param packed: packed rows of shape (height, ceil(width / 8))
+    :type packed: numpy.ndarray
+    :param width: number of columns of the unpacked map
+    :type width: int
+    """
+
+    dtype = np.dtype(bool)
+    ndim = 2
+
+    def __init__(self, packed, width):
+        assert packed.dtype == np.uint8
+        assert packed.shape[1] == (width + 7) // 8
+        self.packed = packed
+        self.shape = (packed.shape[0], width)
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        i, j = key
+        if isinstance(i, slice) or isinstance(j, slice):
+            rows = np.unpackbits(self.packed[i], axis=-1, count=self.shape[1])
+            return rows[..., j].astype(bool)
+        j = np.asarray(j)
+        bits = self.packed[i, j >> 3] >> (7 - (j & 7))
+        return (bits & 1).astype(bool)
+
+    def __array__(self, dtype=None, copy=None):
+        array = np.unpackbits(self.packed, axis=1, count=self.shape[1])
+        return array.astype(bool if dtype is None else dtype)
+
+
+def occupancy_cache_filename(filename, threshold):
+    root, _ = os.path.splitext(filename)
+    return f"{root}_occupancy_{threshold:g}.npy"
+
+
+def _occupancy_cache_meta(cache):
+    """
+    Thresholding parameters stored next to an occupancy cache, or `None`.
+    """
+    try:
+        with open(cache + ".json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_occupancy(filename,
+                   threshold=0.9,
+                   byteorder=">",
+                   cache=None,
+                   chunk_rows=1024):
+    """
+    Threshold a PGM map into a bit-packed occupancy grid map.
+
+    Gray values are normalized as in the demos and cells whose normalized
+    value is below `threshold` are occupied. The image is processed in
+    blocks of `chunk_rows` rows, so the full map is never resident.
+
+    :param filename: path to the PGM file
+    :type filename: str
+    :param threshold: normalized gray value below which a cell is occupied
+    :type threshold: float, optional
+    :param byteorder: byte order of 16-bit images, defaults to ">"
+    :type byteorder: str, optional
+    :param cache: path of the `.npy` cache, `True` for a path next to the
+        PGM file, or `None` to keep the packed map in memory. The cache is
+        rebuilt when the PGM file is newer or when it was built with a
+        different `threshold` or `byteorder`.
+    :type cache: str or bool, optional
+    :param chunk_rows: number of rows processed at a time
+    :type chunk_rows: int, optional
+    :rtype: PackedOccupancy
+    """
+    if cache is True:
+        cache = occupancy_cache_filename(filename, threshold)
+    _, height, width, _ = read_pgm_header(filename)
+    meta = dict(threshold=float(threshold), byteorder=byteorder)
+    if (cache is not None and os.path.exists(cache)
+            and os.path.getmtime(cache) >= os.path.getmtime(filename)
+            and _occupancy_cache_meta(cache) == meta):
+        packed = np.load(cache, mmap_mode="r")
+        if packed.shape == (height, (width + 7) // 8):
+            return PackedOccupancy(packed, width)
+
+    image = read_pgm(filename, byteorder)
+    vmin, vmax = np.inf, -np.inf
+    for start in range(0, height, chunk_rows):
+        block = image[start:start + chunk_rows]
+        vmin = min(vmin, float(block.min()))
+        vmax = max(vmax, float(block.max()))
+    if vmax <= 0:
+        raise ValueError("PGM file '%s' is completely black" % filename)
+
+    shape = (height, (width + 7) // 8)
+    if cache is None:
+        packed = np.empty(shape, dtype=np.uint8)
+    else:
+        packed = np.lib.format.open_memmap(cache,
+                                           mode="w+",
+                                           dtype=np.uint8,
+                                           shape=shape)
+    for start in range(0, height, chunk_rows):
+        block = image[start:start + chunk_rows]
+        occupied = (block - vmin) / vmax < threshold
+        packed[start:start + chunk_rows] = np.packbits(occupied, axis=1)
+    if cache is not None:
+        packed.flush()
+        packed = np.load(cache, mmap_mode="r")
+        with open(cache + ".json", "w") as f:
+            json.dump(meta, f)
+    return PackedOccupancy(packed, width)
+
+
+def save_reward_map(reward_map, filename, dtype=np.float32, chunk_rows=1024):
+    """
+    Store a reward map as a memory-mappable `.npy` file.
+
+    The map is cast to `dtype` block by block, so no full-size converted
+    copy is created.
+
+    :param reward_map: reward map of shape (height, width) or
+        (height, width, num_objectives)
+    :type reward_map: numpy.ndarray
+    :param filename: path of the `.npy` file
+    :type filename: str
+    """
+    stored = np.lib.format.open_memmap(filename,
+                                       mode="w+",
+                                       dtype=dtype,
+                                       shape=reward_map.shape)
+    for start in range(0, reward_map.shape[0], chunk_rows):
+        stored[start:start + chunk_rows] = reward_map[start:start + chunk_rows]
+    stored.flush()
+    del stored
+
+
+def load_reward_map(filename):
+    """
+    Open a reward map saved by `save_reward_map` without reading it.
+
+    :rtype: numpy.memmap
+    """
+    return np.load(filename, mmap_mode="r")
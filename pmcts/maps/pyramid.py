@@ -0,0 +1,97 @@
+"""
+Multi-resolution pyramid of reward and occupancy grid maps.
+"""
+import numpy as np
+
+
+def _block_sum(array, factor, reducer=np.sum):
+    """
+    Reduce non-overlapping `factor` x `factor` blocks of the first two axes.
+
+    The array is padded with zeros (or `False`) when its shape is not a
+    multiple of `factor`.
+    """
+    rows, cols = array.shape[:2]
+    pad_rows = -rows % factor
+    pad_cols = -cols % factor
+    if pad_rows or pad_cols:
+        padding = [(0, pad_rows), (0, pad_cols)] + [(0, 0)] * (array.ndim - 2)
+        array = np.pad(array, padding)
+    shape = (array.shape[0] // factor, factor, array.shape[1] // factor,
+             factor) + array.shape[2:]
+    return reducer(array.reshape(shape), axis=(1, 3))
+
+
+class MapPyramid:
+    """
+    Coarse-to-fine copies of a reward map and an occupancy grid map.
+
+    Level 0 holds the original maps. Each following level merges blocks of
+    `factor` x `factor` cells of the previous one: rewards are averaged and
+    a coarse cell is occupied if any of its fine cells is occupied, so
+    collision checks at a coarse level are conservative.
+
+    :param reward_map: reward map of shape (height, width) or
+        (height, width, num_objectives)
+    :type reward_map: numpy.ndarray
+    :param occupancy_map: boolean occupancy grid map of shape (height, width)
+    :type occupancy_map: numpy.ndarray
+    :param num_levels: number of levels including the original maps
+    :type num_levels: int
+    :param factor: block size between two consecutive levels, defaults to 2
+    :type factor: int, optional
+    :param chunk_rows: number of coarse rows built at a time, defaults to 256
+    :type chunk_rows: int, optional
+    """
+
+    def __init__(self,
+                 reward_map,
+                 occupancy_map,
+                 num_levels,
+                 factor=2,
+                 chunk_rows=256):
+        assert num_levels >= 1
+        assert factor >= 2
+        assert reward_map.shape[:2] == occupancy_map.shape
+        self.factor = factor
+        self.reward_maps = [reward_map]
+        self.occupancy_maps = [occupancy_map]
+        # Number of original cells covered by each coarse row and column.
+        row_counts = np.ones(reward_map.shape[0])
+        col_counts = np.ones(reward_map.shape[1])
+        for _ in range(1, num_levels):
+            reward, occupancy = self.reward_maps[-1], self.occupancy_maps[-1]
+            coarse_rows = _block_sum(row_counts[:, None], factor)[:, 0]
+            coarse_cols = _block_sum(col_counts[None, :], factor)[0]
+            coarse_reward = np.empty(
+                (len(coarse_rows), len(coarse_cols)) + reward.shape[2:],
+                dtype=reward.dtype)
+            coarse_occupancy = np.empty(coarse_reward.shape[:2], dtype=bool)
+            fine_rows = chunk_rows * factor
+            for start in range(0, reward.shape[0], fine_rows):
+                stop = start + fine_rows
+                weights = np.outer(row_counts[start:stop], col_counts)
+                area = np.outer(coarse_rows[start // factor:stop // factor],
+                                coarse_cols)
+                if reward.ndim == 3:
+                    weights = weights[:, :, None]
+                    area = area[:, :, None]
+                block = np.asarray(reward[start:stop]) * weights
+                coarse_reward[start // factor:stop // factor] = \
+                    _block_sum(block, factor) / area
+                coarse_occupancy[start // factor:stop // factor] = \
+                    _block_sum(np.asarray(occupancy[start:stop]), factor,
+                               np.any)
+            self.reward_maps.append(coarse_reward)
+            self.occupancy_maps.append(coarse_occupancy)
+            row_counts, col_counts = coarse_rows, coarse_cols
+
+    @property
+    def num_levels(self):
+        return len(self.reward_maps)
+
+    def level(self, index):
+        """
+        Reward map and occupancy grid map of the given level.
+        """
+        return self.reward_maps[index], self.occupancy_maps[index]
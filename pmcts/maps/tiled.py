@@ -0,0 +1,124 @@
+"""
+Tiled maps loaded on demand from disk.
+"""
+import json
+import os
+import numpy as np
+
+from ..utilities.cache import LRUCache
+
+
+def _tile_filename(directory, tile_row, tile_col):
+    return os.path.join(directory, f"tile_{tile_row}_{tile_col}.npy")
+
+
+def save_tiles(array, directory, tile_size):
+    """
+    Split a map into square tiles stored as `.npy` files in `directory`.
+
+    The map is read one band of tiles at a time, so memory-mapped maps
+    larger than memory can be tiled.
+
+    :param array: reward map or occupancy grid map
+    :type array: numpy.ndarray
+    :param directory: output directory
+    :type directory: str
+    :param tile_size: number of rows and columns per tile
+    :type tile_size: int
+    """
+    os.makedirs(directory, exist_ok=True)
+    for tile_row, start in enumerate(range(0, array.shape[0], tile_size)):
+        band = np.asarray(array[start:start + tile_size])
+        for tile_col, col in enumerate(range(0, array.shape[1], tile_size)):
+            np.save(_tile_filename(directory, tile_row, tile_col),
+                    band[:, col:col + tile_size])
+    meta = dict(shape=list(array.shape),
+                dtype=np.dtype(array.dtype).str,
+                tile_size=tile_size)
+    with open(os.path.join(directory, "tiles.json"), "w") as f:
+        json.dump(meta, f)
+
+
+class TiledMap:
+    """
+    Map split into fixed-size tiles that are loaded when first queried.
+
+    Loaded tiles are kept in a least-recently-used cache whose total size
+    is bounded by `memory_budget` bytes, so only the tiles around the
+    searched area stay resident. Indexing with a pair of index arrays
+    behaves like indexing the dense map, which lets the planners use a
+    `TiledMap` in place of a reward map or an occupancy grid map.
+
+    :param directory: directory written by `save_tiles`
+    :type directory: str
+    :param memory_budget: maximum bytes of resident tiles, defaults to 256 MiB
+    :type memory_budget: int, optional
+    """
+
+    def __init__(self, directory, memory_budget=256 * 2**20):
+        with open(os.path.join(directory, "tiles.json")) as f:
+            meta = json.load(f)
+        self.directory = directory
+        self.shape = tuple(meta["shape"])
+        self.dtype = np.dtype(meta["dtype"])
+        self.ndim = len(self.shape)
+        self.tile_size = meta["tile_size"]
+        self.num_tile_cols = -(-self.shape[1] // self.tile_size)
+        self.tiles = LRUCache(memory_budget, sizeof=lambda tile: tile.nbytes)
+
+    @classmethod
+    def from_array(cls, array, directory, tile_size, memory_budget=256 * 2**20):
+        save_tiles(array, directory, tile_size)
+        return cls(directory, memory_budget)
+
+    def tile(self, tile_row, tile_col):
+        key = (tile_row, tile_col)
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = np.load(_tile_filename(self.directory, tile_row, tile_col))
+            self.tiles.put(key, tile)
+        return tile
+
+    def gather(self, i, j):
+        """
+        Values at the cells `(i[k], j[k])`, loading the tiles they fall in.
+        """
+        i = np.asarray(i)
+        j = np.asarray(j)
+        ij_shape = np.broadcast(i, j).shape
+        i = np.broadcast_to(i, ij_shape).ravel()
+        j = np.broadcast_to(j, ij_shape).ravel()
+        tile_rows = i // self.tile_size
+        tile_cols = j // self.tile_size
+        tile_ids = tile_rows * self.num_tile_cols + tile_cols
+        values = np.empty((len(i),) + self.shape[2:], dtype=self.dtype)
+        # Consecutive cells of a primitive usually share one or two tiles.
+        unique_ids, inverse = np.unique(tile_ids, return_inverse=True)
+        for k, tile_id in enumerate(unique_ids):
+            tile_row, tile_col = divmod(int(tile_id), self.num_tile_cols)
+            tile = self.tile(tile_row, tile_col)
+            mask = inverse == k
+            values[mask] = tile[i[mask] - tile_row * self.tile_size,
+                                j[mask] - tile_col * self.tile_size]
+        return values.reshape(ij_shape + self.shape[2:])
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        i, j = key[:2]
+        if isinstance(i, slice) or isinstance(j, slice):
+            if isinstance(i, slice):
+                i = np.arange(*i.indices(self.shape[0]))
+            if isinstance(j, slice):
+                j = np.arange(*j.indices(self.shape[1]))
+            i, j = np.ix_(np.atleast_1d(i), np.atleast_1d(j))
+            values = self.gather(i, j)
+            squeeze = tuple(axis for axis, index in enumerate(key[:2])
+                            if np.ndim(index) == 0
+                            and not isinstance(index, slice))
+            return np.squeeze(values, axis=squeeze)
+        return self.gather(i, j)
+
+    def __array__(self, dtype=None, copy=None):
+        array = self[:, :]
+        return array if dtype is None else array.astype(dtype)
@@ -1,2 +1,3 @@
 from .uct import Node, UCT
 from .puct import ParetoUCT
+from .ensemble import ScalarizedEnsemble
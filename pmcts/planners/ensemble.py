@@ -0,0 +1,229 @@
+"""
+Ensemble of scalarized UCT searches as an alternative to Pareto UCT.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import mmap
+import os
+import shutil
+import tempfile
+import numpy as np
+
+from .uct import UCT
+from .puct import build_pareto_front
+from ..maps import PackedOccupancy, TiledMap
+from ..utilities.indexing import xy_to_ij
+
+# Maps opened by a worker process, keyed by their shared description. Only
+# the maps of the latest job are kept.
+_shared_maps = {}
+
+
+def _open_shared(shared):
+    if shared not in _shared_maps:
+        kind, path = shared[:2]
+        if kind == "tiled":
+            _shared_maps[shared] = TiledMap(path, memory_budget=shared[2])
+        elif kind == "packed":
+            _shared_maps[shared] = PackedOccupancy(
+                np.load(path, mmap_mode="r"), shared[2])
+        else:
+            _shared_maps[shared] = np.load(path, mmap_mode="r")
+    return _shared_maps[shared]
+
+
+def _npy_filename(array):
+    """
+    File name of a whole `.npy` file mapped by `array`, or `None`.
+    """
+    # Views of a memory-mapped file keep its name but not its layout.
+    if (isinstance(array, np.memmap) and array.filename is not None
+            and str(array.filename).endswith(".npy")
+            and isinstance(array.base, mmap.mmap)):
+        return str(array.filename)
+    return None
+
+
+def _scalarized_search(job):
+    params, weights, pose, reward_map, occupancy_map = job
+    if isinstance(reward_map, tuple):
+        for shared in set(_shared_maps) - {reward_map, occupancy_map}:
+            del _shared_maps[shared]
+        reward_map = _open_shared(reward_map)
+        occupancy_map = _open_shared(occupancy_map)
+    uct = UCT(objective_weights=weights, **params)
+    action = uct.search(pose, reward_map, occupancy_map)
+    return action, uct.get_trajectory(), uct.num_iterations
+
+
+def default_weights(num_objectives):
+    """
+    One weight vector per objective plus the equally weighted sum.
+    """
+    weights = np.vstack([
+        np.eye(num_objectives),
+        np.full(num_objectives, 1.0 / num_objectives),
+    ])
+    return weights
+
+
+class ScalarizedEnsemble:
+    """
+    Several UCT searches, each maximizing a weighted sum of the objectives,
+    whose best actions are merged into a Pareto set.
+
+    The searches run concurrently in a process pool. The maps are written
+    once to memory-mapped `.npy` files that all workers share, unless they
+    are memory-mapped `.npy` files already. Tiled maps are shared by their
+    tile directory and bit-packed occupancy maps by their packed rows, so
+    neither is ever expanded to a dense array. Each candidate action is rated
+    by the rewards of all objectives collected along the best trajectory of
+    its search, and the non-dominated candidates form the Pareto set.
+
+    The parameters are those of `UCT`, plus:
+
+    :param objective_weights: weight vectors of shape
+        (num_searches, num_objectives), defaults to `default_weights`
+    :type objective_weights: numpy.ndarray, optional
+    :param num_workers: number of processes, 0 runs the searches in this
+        process, defaults to the number of CPUs
+    :type num_workers: int, optional
+    """
+
+    def __init__(self,
+                 extent,
+                 angle_range,
+                 velocity,
+                 num_actions,
+                 duration,
+                 weight,
+                 max_iter,
+                 max_rollout,
+                 objective_weights=None,
+                 num_workers=None,
+                 **kwargs):
+        self.extent = extent
+        self.params = dict(
+            extent=extent,
+            angle_range=angle_range,
+            velocity=velocity,
+            num_actions=num_actions,
+            duration=duration,
+            weight=weight,
+            max_iter=max_iter,
+            max_rollout=max_rollout,
+            **kwargs,
+        )
+        self.objective_weights = objective_weights
+        self.num_workers = num_workers
+        self.executor = None
+        self.shared_dir = None
+        self.shared_maps = None
+        self.num_shared = 0
+        # Files written by `save_shared`, deleted once no map uses them
+        self.written_files = set()
+        self.num_iterations = 0
+
+    def save_shared(self, name, array):
+        """
+        Write an array to a new `.npy` file in the shared directory.
+        """
+        if self.shared_dir is None:
+            self.shared_dir = tempfile.mkdtemp(prefix="pmcts_")
+        # New names, so workers never reuse a stale map
+        self.num_shared += 1
+        filename = os.path.join(self.shared_dir,
+                                f"{name}_{self.num_shared}.npy")
+        np.save(filename, array)
+        self.written_files.add(filename)
+        return filename
+
+    def share_map(self, name, array):
+        """
+        Description of a map from which a worker process can open it.
+        """
+        if isinstance(array, TiledMap):
+            return ("tiled", array.directory, array.tiles.max_size)
+        if isinstance(array, PackedOccupancy):
+            filename = _npy_filename(array.packed)
+            if filename is None:
+                filename = self.save_shared(name, np.asarray(array.packed))
+            return ("packed", filename, array.shape[1])
+        filename = _npy_filename(array)
+        if filename is None:
+            filename = self.save_shared(name, np.asarray(array))
+        return ("npy", filename)
+
+    def share_maps(self, reward_map, occupancy_map):
+        """
+        Shared descriptions of the maps, written once per map.
+
+        Files written for maps that are no longer used are deleted, so only
+        the current maps occupy space in the shared directory.
+        """
+        previous = self.shared_maps
+        if previous is None:
+            previous = (None, None, [None, None])
+        shared = []
+        for idx, (name, array) in enumerate([("reward", reward_map),
+                                             ("occupancy", occupancy_map)]):
+            if previous[idx] is array:
+                shared.append(previous[2][idx])
+            else:
+                shared.append(self.share_map(name, array))
+        self.shared_maps = (reward_map, occupancy_map, shared)
+        unused = self.written_files - {path for _, path, *_ in shared}
+        for filename in unused:
+            os.remove(filename)
+        self.written_files -= unused
+        return shared
+
+    def search(self, pose, reward_map, occupancy_map):
+        assert reward_map.ndim == 3
+        weights = self.objective_weights
+        if weights is None:
+            weights = default_weights(reward_map.shape[2])
+        if self.num_workers == 0:
+            jobs = [(self.params, w, pose.copy(), reward_map, occupancy_map)
+                    for w in weights]
+            results = list(map(_scalarized_search, jobs))
+        else:
+            reward_shared, occupancy_shared = self.share_maps(
+                reward_map, occupancy_map)
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(self.num_workers)
+            jobs = [(self.params, w, pose.copy(), reward_shared,
+                     occupancy_shared) for w in weights]
+            results = list(self.executor.map(_scalarized_search, jobs))
+        self.num_iterations = sum(result[2] for result in results)
+
+        # Rate every candidate by all objectives along its best trajectory.
+        max_row = reward_map.shape[0] - 1
+        max_col = reward_map.shape[1] - 1
+        values = {}
+        for idx, (_, trajectory, _) in enumerate(results):
+            ij = xy_to_ij(trajectory[:, :2], self.extent, max_row, max_col)
+            values[idx] = np.sum(reward_map[ij[:, 0], ij[:, 1]], axis=0)
+        pareto_front = build_pareto_front(dict(values))
+        self.pareto_actions = [results[idx][0] for idx in pareto_front]
+        self.pareto_values = [values[idx] for idx in pareto_front]
+        best = max(pareto_front, key=lambda idx: np.sum(values[idx]))
+        return results[best][0]
+
+    def close(self):
+        """
+        Stop the worker processes and delete the shared maps.
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        if self.shared_dir is not None:
+            shutil.rmtree(self.shared_dir, ignore_errors=True)
+            self.shared_dir = None
+        self.shared_maps = None
+        self.written_files = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
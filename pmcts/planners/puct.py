@@ -1,6 +1,9 @@
+import math
+import operator
 import numpy as np
 from numpy.random import choice
 from .uct import UCT
+from ..utilities.hypervolume import hypervolume_contributions
 
 
 def build_pareto_front(dic):
@@ -21,6 +24,8 @@ def build_pareto_front(dic):
 
 
 class ParetoUCT(UCT):
+    stopping_rules = (None, "pareto")
+
     def __init__(
         self,
         extent,
@@ -31,7 +36,13 @@ class ParetoUCT(UCT):
         weight,
         max_iter,
         max_rollout,
+        selection="random",
+        num_samples=10000,
+        **kwargs,
     ):
+        # Dominance checks are quadratic in the number of children, so the
+        # NumPy kernel pays off much earlier than for UCT.
+        kwargs.setdefault("fast_select_threshold", 6)
         super(ParetoUCT, self).__init__(
             extent,
             angle_range,
@@ -41,7 +52,43 @@ class ParetoUCT(UCT):
             weight,
             max_iter,
             max_rollout,
+            **kwargs,
         )
+        # Children on the Pareto front are either picked at random or by
+        # their hypervolume contribution. `num_samples` is only used to
+        # estimate contributions for more than three objectives.
+        assert selection in ("random", "hypervolume")
+        self.selection = selection
+        self.num_samples = num_samples
+
+    def child_score(self, child):
+        """
+        Children are ranked by the sum of their mean rewards over all
+        objectives.
+        """
+        if self.best_child_criterion == "visits":
+            return child.num_visits
+        return float(np.sum(child.reward)) / child.num_visits
+
+    def converged(self, remaining):
+        """
+        With the "pareto" rule, the search stops once the Pareto set of the
+        root's children has not changed for `stop_patience` checks.
+        """
+        node = self.root
+        if node.unvisited_actions or not node.children:
+            return False
+        values = {
+            idx: child.reward / child.num_visits
+            for idx, child in enumerate(node.children)
+        }
+        front = set(build_pareto_front(values))
+        if front == self.root_front:
+            self.stable_checks += 1
+        else:
+            self.root_front = front
+            self.stable_checks = 0
+        return self.stable_checks >= self.stop_patience
 
     def select(self, node):
         # Select this node if it has some unvisited actions
@@ -51,25 +98,110 @@ class ParetoUCT(UCT):
         elif not node.children:
             return node, False
         else:  # All actions have been visited and the children dict is not empty
-            exploitation_scores = [
-                child.reward / child.num_visits for child in node.children
+            if self.selection == "hypervolume":
+                index = self.select_by_hypervolume(
+                    self.upper_confidence_bounds(node))
+            else:
+                if len(node.children) <= self.fast_select_threshold:
+                    pareto_front = self.pareto_front_scalar(node)
+                else:
+                    pareto_front = self.pareto_front_vectorized(node)
+                index = pareto_front[np.random.randint(len(pareto_front))]
+            selected_node, has_valid_child = self.select(node.children[index])
+            return selected_node, has_valid_child
+
+    def upper_confidence_bounds(self, node):
+        """
+        Upper confidence bound vectors of all children, computed with NumPy.
+        """
+        children = node.children
+        visits = np.fromiter((child.num_visits for child in children),
+                             dtype=float,
+                             count=len(children))
+        exploitation_scores = np.array(
+            [child.reward for child in children], dtype=float) / visits[:, None]
+        if self.use_prior:
+            priors = np.array([child.prior for child in children])
+            exploration_scores = priors * np.sqrt(node.num_visits) / (1.0 +
+                                                                     visits)
+        else:
+            # Equation (3) in the paper
+            num_objectives = exploitation_scores.shape[1]
+            exploration_scores = np.sqrt(
+                (4.0 * self.log_visits(node.num_visits) +
+                 math.log(num_objectives)) / (2.0 * visits))
+        explore_weight = np.max(exploitation_scores, axis=0) * self.weight
+        return exploitation_scores + \
+            explore_weight * exploration_scores[:, None]
+
+    def pareto_front_vectorized(self, node):
+        """
+        Indices of the children whose upper confidence bounds are not
+        dominated, computed with NumPy.
+        """
+        ucb = self.upper_confidence_bounds(node)
+        # geq[i, j] tells whether child j is nowhere smaller than child i and
+        # greater[i, j] whether it is larger somewhere. Reducing over the
+        # objectives one column at a time is much faster than over a short
+        # last axis.
+        geq = ucb[None, :, 0] >= ucb[:, None, 0]
+        greater = ucb[None, :, 0] > ucb[:, None, 0]
+        for k in range(1, ucb.shape[1]):
+            geq &= ucb[None, :, k] >= ucb[:, None, k]
+            greater |= ucb[None, :, k] > ucb[:, None, k]
+        return np.flatnonzero(~np.any(geq & greater, axis=1)).tolist()
+
+    def pareto_front_scalar(self, node):
+        """
+        Indices of the children whose upper confidence bounds are not
+        dominated, computed with `math`.
+        """
+        children = node.children
+        exploitation_scores = [[
+            value / child.num_visits for value in child.reward.tolist()
+        ] for child in children]
+        if self.use_prior:
+            sqrt_visits = math.sqrt(node.num_visits)
+            exploration_scores = [
+                float(child.prior) * sqrt_visits / (1.0 + child.num_visits)
+                for child in children
             ]
+        else:
             # Equation (3) in the paper
+            numerator = 4.0 * self.log_visits(node.num_visits) + math.log(
+                len(exploitation_scores[0]))
             exploration_scores = [
-                np.sqrt(
-                    (4.0 * np.log(node.num_visits) + np.log(len(child.reward)))
-                    / (2.0 * child.num_visits)
-                )
-                for child in node.children
+                math.sqrt(numerator / (2.0 * child.num_visits))
+                for child in children
             ]
-            explore_weight = np.max(exploitation_scores, axis=0) * self.weight
-            upper_confidence_bounds = {
-                idx: exploit + explore_weight * explore
-                for idx, (exploit, explore) in enumerate(
-                    zip(exploitation_scores, exploration_scores)
-                )
-            }
-            pareto_front = build_pareto_front(upper_confidence_bounds)
-            index = choice(list(pareto_front.keys()))
-            selected_node, has_valid_child = self.select(node.children[index])
-            return selected_node, has_valid_child
+        explore_weights = [
+            max(scores) * self.weight for scores in zip(*exploitation_scores)
+        ]
+        ucb = [
+            tuple(exploit + weight * explore
+                  for exploit, weight in zip(exploits, explore_weights))
+            for exploits, explore in zip(exploitation_scores,
+                                         exploration_scores)
+        ]
+        # A different point that is nowhere smaller dominates
+        return [
+            i for i, ucb_i in enumerate(ucb) if not any(
+                ucb_j != ucb_i and all(map(operator.le, ucb_i, ucb_j))
+                for ucb_j in ucb)
+        ]
+
+    def select_by_hypervolume(self, upper_confidence_bounds):
+        """
+        Index of the child with the largest hypervolume contribution.
+
+        The reference point lies 10% of the spread below the smallest upper
+        confidence bounds, so that every point on the front contributes.
+        Ties are broken at random.
+        """
+        lower = np.min(upper_confidence_bounds, axis=0)
+        spread = np.max(upper_confidence_bounds, axis=0) - lower
+        ref = lower - 0.1 * spread - self.eps
+        contributions = hypervolume_contributions(
+            upper_confidence_bounds, ref, self.num_samples)
+        best = np.flatnonzero(contributions == np.max(contributions))
+        return choice(best)
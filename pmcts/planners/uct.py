@@ -1,10 +1,12 @@
 """
 Upper confidence bound applied to Monte-Carlo tree search (UCT).
 """
-from copy import copy
+import math
 import numpy as np
 
 from ..actions import DiscreteActions
+from ..maps import MapPyramid
+from ..utilities.cache import LRUCache
 from ..utilities.indexing import xy_to_ij
 
 
@@ -14,20 +16,30 @@ class Node:
                  num_actions,
                  reward=0.0,
                  action=None,
-                 parent=None):
+                 parent=None,
+                 action_idx=None):
         self.pose = pose
         self.unvisited_actions = list(range(num_actions))
         self.reward = reward
         self.action = action
+        self.action_idx = action_idx
         self.parent = parent
         self.children = list()
+        self.invalid_actions = list()
+        self.priors = None
+        self.prior = 1.0
+        self.best_child = None
+        self.visited = None
         self.num_visits = 0
+        self.depth = 0 if parent is None else parent.depth + 1
 
     def add_child(self, node):
         self.children.append(node)
 
 
 class UCT:
+    stopping_rules = (None, "visits", "confidence")
+
     def __init__(
         self,
         extent,
@@ -39,49 +51,184 @@ class UCT:
         max_iter,
         max_rollout,
         obstacle_penelty=-1.0,
+        rollout_level=0,
+        expand_level=0,
+        coarse_expand_depth=0,
+        pyramid_factor=2,
+        stopping_rule=None,
+        check_interval=10,
+        stop_patience=3,
+        max_nodes=None,
+        prune_ratio=0.8,
+        best_child_criterion="value",
+        unique_cells=False,
+        expansion="single",
+        dtype=np.float64,
+        use_prior=False,
+        prior_temperature=1.0,
+        objective_weights=None,
+        rollout_cache_size=0,
+        heading_bins=16,
+        fast_select_threshold=64,
     ):
         self.extent = extent
         self.num_actions = num_actions
         # Number of actions must be an odd number
         assert self.num_actions % 2 != 0
-        self.weight = weight
+        self.weight = float(weight)
         self.max_iter = max_iter
         self.max_rollout = max_rollout
+        # Floating-point type of primitives, poses, tree statistics and
+        # intermediate buffers. Cell indices are int32 with float32.
+        self.dtype = np.dtype(dtype)
+        self.index_dtype = np.int32 if self.dtype == np.float32 else np.int64
+        # Heuristic priors over the primitives of each node bias the
+        # exploration term PUCT-style and order the expansions.
+        self.use_prior = use_prior
+        self.prior_temperature = prior_temperature
+        # Multi-objective reward maps are reduced to a weighted sum of their
+        # channels as the cells are gathered.
+        self.objective_weights = None
+        if objective_weights is not None:
+            self.objective_weights = np.asarray(objective_weights,
+                                                dtype=self.dtype)
+        # Rollout values are cached by grid cell and heading bin. The cache
+        # is kept across searches and cleared when a different map is given.
+        # It is not used with path-dependent rewards.
+        self.rollout_cache = None
+        if rollout_cache_size > 0 and not unique_cells:
+            self.rollout_cache = LRUCache(rollout_cache_size)
+        self.heading_bins = heading_bins
+        self.cached_maps = (None, None)
+        # Primitives and rollout length the cached values were computed with
+        self.cached_rollout = (None, None)
+        # Nodes with at most `fast_select_threshold` children are scored
+        # with plain Python floats, where NumPy call overhead would dominate.
+        # See demo/select_kernel.py for the crossover point.
+        self.fast_select_threshold = fast_select_threshold
+        self.log_table = [-math.inf] + [
+            math.log(n) for n in range(1, max_iter + 2)
+        ]
         self.actor = DiscreteActions(
             angle_range,
             num_actions,
             duration,
             velocity,
+            self.dtype,
         )
         self.eps = 1e-6
         self.obstacle_penelty = obstacle_penelty
+        # Rollouts are evaluated at level `rollout_level` of a map pyramid
+        # whose resolution shrinks by `pyramid_factor` per level. Children
+        # deeper than `coarse_expand_depth` are expanded at `expand_level`.
+        # Level 0 is the original map.
+        self.rollout_level = rollout_level
+        self.expand_level = expand_level
+        self.coarse_expand_depth = coarse_expand_depth
+        self.pyramid_factor = pyramid_factor
+        self.pyramid = None
+        # Early termination is checked every `check_interval` iterations.
+        # See `converged` for the available stopping rules.
+        assert stopping_rule in self.stopping_rules
+        self.stopping_rule = stopping_rule
+        self.check_interval = check_interval
+        self.stop_patience = stop_patience
+        self.num_iterations = 0
+        self.iterations_saved = 0
+        # When the tree grows beyond `max_nodes`, the least-visited subtrees
+        # are pruned until `prune_ratio * max_nodes` nodes are left. The
+        # root and its children are never pruned, so that target must leave
+        # room for them.
+        assert 0.0 < prune_ratio < 1.0
+        assert max_nodes is None or int(prune_ratio * max_nodes) > num_actions
+        self.max_nodes = max_nodes
+        self.prune_ratio = prune_ratio
+        self.num_nodes = 0
+        self.num_pruned = 0
+        self.free_nodes = []
+        # Every node keeps a pointer to its best child, ranked by mean
+        # reward ("value") or by number of visits ("visits").
+        assert best_child_criterion in ("value", "visits")
+        self.best_child_criterion = best_child_criterion
+        # A lead in visits only settles a decision made by visits.
+        assert stopping_rule != "visits" or best_child_criterion == "visits"
+        # Only reward cells not yet covered by the path from the root. Each
+        # node then stores the sorted indices of the covered cells.
+        self.unique_cells = unique_cells
+        # Expand one primitive per iteration ("single"), or all unvisited
+        # primitives of a node at once ("batch").
+        assert expansion in ("single", "batch")
+        self.expansion = expansion
 
     def search(self, pose, reward_map, occupancy_map):
+        pose = np.asarray(pose, dtype=self.dtype)
         # Save reward map and occupancy map
         self.reward = reward_map
         self.occupancy = occupancy_map
         assert self.occupancy.dtype == bool
         self.max_row = self.reward.shape[0] - 1
         self.max_col = self.reward.shape[1] - 1
+        if (self.cached_maps[0] is not reward_map
+                or self.cached_maps[1] is not occupancy_map):
+            if self.rollout_cache is not None:
+                self.rollout_cache.clear()
+            self.cached_maps = (reward_map, occupancy_map)
+        # The pyramid is only rebuilt when a different map is given.
+        num_levels = max(self.rollout_level, self.expand_level) + 1
+        if num_levels > 1 and (self.pyramid is None
+                               or self.pyramid.num_levels < num_levels
+                               or self.pyramid.reward_maps[0] is not reward_map
+                               or self.pyramid.occupancy_maps[0]
+                               is not occupancy_map):
+            self.pyramid = MapPyramid(reward_map, occupancy_map, num_levels,
+                                      self.pyramid_factor)
 
         # Initialize root node
-        self.root = Node(pose, self.num_actions)
+        self.root = self.new_node(pose, self.dtype.type(0))
+        if self.unique_cells:
+            self.root.visited = np.empty(0, dtype=np.int64)
+        self.num_nodes = 1
+        self.num_pruned = 0
+        self.num_iterations = 0
+        self.stable_checks = 0
+        self.root_front = None
         # MCTS main loop
-        for _ in range(self.max_iter):
+        # A batch expansion backs up to one visit per primitive, so the
+        # remaining budget of backups is that many times larger.
+        backups_per_iteration = 1
+        if self.expansion == "batch":
+            backups_per_iteration = self.num_actions
+        for iteration in range(self.max_iter):
+            if (self.stopping_rule is not None and iteration > 0
+                    and iteration % self.check_interval == 0
+                    and self.converged(
+                        (self.max_iter - iteration) * backups_per_iteration)):
+                break
+            self.num_iterations += 1
             # Selection
             expandable_node, has_valid_child = self.select(self.root)
             # This branch is blocked by obstacles.
             if not has_valid_child:
                 continue
             # Expansion
-            new_node = self.expand(expandable_node)
+            if self.expansion == "batch":
+                num_invalid = len(expandable_node.invalid_actions)
+                new_nodes = self.expand_all(expandable_node)
+                # One penalty per invalid action, as in single expansion
+                num_invalid = len(expandable_node.invalid_actions) - num_invalid
+            else:
+                new_node = self.expand(expandable_node)
+                new_nodes = [] if new_node is None else [new_node]
+                num_invalid = 1 if new_node is None else 0
             # Simulation / rollout and backpropagation
-            if new_node is None:  # No valid action available.
+            for _ in range(num_invalid):  # No valid action available.
                 reward = self.obstacle_penelty  # Discourage searching towards obstacles
                 self.backpropagation(expandable_node, reward)
-            else:
+            for new_node in new_nodes:
                 reward = self.rollout(new_node)
                 self.backpropagation(new_node, reward)
+            if self.max_nodes is not None and self.num_nodes > self.max_nodes:
+                self.prune()
 
         if not self.root.children:
             x, y, o = pose
@@ -89,8 +236,42 @@ class UCT:
             pose[2] += np.pi / 8
             print(f"Turn to [{pose[0]: .1f} {pose[1]: .1f} {pose[2]: .1f}]")
             return self.search(pose, reward_map, occupancy_map)
+        self.iterations_saved = self.max_iter - self.num_iterations
         return self.best_action(self.root)
 
+    def converged(self, remaining):
+        """
+        Whether the decision at the root can no longer change.
+
+        With the "visits" rule, which requires the "visits" best-child
+        criterion, the most visited child must lead every other child by
+        more visits than the `remaining` backups could add. With the
+        "confidence" rule, the lower confidence bound of the best child must
+        exceed the upper confidence bounds of all other children.
+        """
+        node = self.root
+        if node.unvisited_actions or not node.children:
+            return False
+        if len(node.children) == 1:
+            return True
+        leader = node.children.index(node.best_child)
+        others = [
+            idx for idx in range(len(node.children)) if idx != leader
+        ]
+        if self.stopping_rule == "visits":
+            margin = node.children[leader].num_visits - max(
+                node.children[idx].num_visits for idx in others)
+            return margin > remaining
+        values = [child.reward / child.num_visits for child in node.children]
+        # Confidence radii rescaled like the exploration term in `select`
+        scale = np.max(np.abs(values)) + self.eps
+        radii = [
+            scale * np.sqrt(2.0 * np.log(node.num_visits) / child.num_visits)
+            for child in node.children
+        ]
+        lower = values[leader] - radii[leader]
+        return all(lower > values[idx] + radii[idx] for idx in others)
+
     def select(self, node):
         # Select this node if it has some unvisited actions
         if len(node.unvisited_actions) != 0:
@@ -99,24 +280,79 @@ class UCT:
         elif not node.children:
             return node, False
         else:  # All actions have been visited and the children dict is not empty
-            exploitation_scores = [
-                child.reward / child.num_visits for child in node.children
-            ]
+            if len(node.children) <= self.fast_select_threshold:
+                index = self.select_child_scalar(node)
+            else:
+                index = self.select_child_vectorized(node)
+            selected_node, has_valid_child = self.select(node.children[index])
+            return selected_node, has_valid_child
+
+    def log_visits(self, num_visits):
+        """
+        Natural logarithm of a visit count, looked up in a growing table.
+        """
+        table = self.log_table
+        if num_visits >= len(table):
+            table.extend(
+                math.log(n) for n in range(len(table), 2 * num_visits + 1))
+        return table[num_visits]
+
+    def select_child_scalar(self, node):
+        """
+        Index of the child with the highest UCB, computed with `math`.
+        """
+        children = node.children
+        exploitation_scores = [
+            float(child.reward) / child.num_visits for child in children
+        ]
+        if self.use_prior:
+            sqrt_visits = math.sqrt(node.num_visits)
             exploration_scores = [
-                np.sqrt(2.0 * np.log(node.num_visits) / child.num_visits)
-                for child in node.children
+                float(child.prior) * sqrt_visits / (1.0 + child.num_visits)
+                for child in children
             ]
-            # Note that we rescaled the exploration weight according to
-            # the maximum exploitation score.
-            exploitation_scale = (np.max(exploitation_scores) + self.eps)
-            explore_weight = exploitation_scale * self.weight
-            ucb = [
-                exploit + explore_weight * explore for exploit, explore in zip(
-                    exploitation_scores, exploration_scores)
+        else:
+            two_log_visits = 2.0 * self.log_visits(node.num_visits)
+            exploration_scores = [
+                math.sqrt(two_log_visits / child.num_visits)
+                for child in children
             ]
-            index = np.argmax(ucb)
-            selected_node, has_valid_child = self.select(node.children[index])
-            return selected_node, has_valid_child
+        # Note that we rescaled the exploration weight according to
+        # the maximum exploitation score.
+        explore_weight = (max(exploitation_scores) + self.eps) * self.weight
+        best_index, best_ucb = 0, -math.inf
+        for index, (exploit, explore) in enumerate(
+                zip(exploitation_scores, exploration_scores)):
+            ucb = exploit + explore_weight * explore
+            if ucb > best_ucb:
+                best_index, best_ucb = index, ucb
+        return best_index
+
+    def select_child_vectorized(self, node):
+        """
+        Index of the child with the highest UCB, computed with NumPy.
+        """
+        children = node.children
+        num_children = len(children)
+        visits = np.fromiter((child.num_visits for child in children),
+                             dtype=float,
+                             count=num_children)
+        exploitation_scores = np.fromiter(
+            (child.reward for child in children),
+            dtype=float,
+            count=num_children) / visits
+        if self.use_prior:
+            priors = np.fromiter((child.prior for child in children),
+                                 dtype=float,
+                                 count=num_children)
+            exploration_scores = priors * np.sqrt(node.num_visits) / (1.0 +
+                                                                     visits)
+        else:
+            exploration_scores = np.sqrt(
+                2.0 * self.log_visits(node.num_visits) / visits)
+        explore_weight = (np.max(exploitation_scores) + self.eps) * self.weight
+        return int(np.argmax(exploitation_scores +
+                             explore_weight * exploration_scores))
 
     def boundary_check(self, action):
         if np.any(action[:, 0] <= self.extent[0]):
@@ -129,56 +365,351 @@ class UCT:
             return False
         return True
 
-    def collision_check(self, ij):
-        occupied = self.occupancy[ij[:, 0], ij[:, 1]]
+    def map_level(self, level):
+        """
+        Reward map and occupancy grid map at the given pyramid level.
+        """
+        if level == 0:
+            return self.reward, self.occupancy
+        return self.pyramid.level(level)
+
+    def cell_indices(self, xy, level=0):
+        """
+        Row and column indices of positions in the map of the given level.
+
+        A coarse cell covers blocks of original cells, so its indices are
+        those of the original cell divided by the block size.
+        """
+        ij = xy_to_ij(xy, self.extent, self.max_row, self.max_col,
+                      self.index_dtype)
+        if level == 0:
+            return ij
+        return ij // self.pyramid.factor**level
+
+    def collision_check(self, ij, occupancy=None):
+        if occupancy is None:
+            occupancy = self.occupancy
+        occupied = occupancy[ij[:, 0], ij[:, 1]]
         if np.any(occupied):
             return False
         return True
 
+    def expansion_level(self, parent):
+        # Deep nodes can be evaluated in a coarser map
+        if parent.depth >= self.coarse_expand_depth:
+            return self.expand_level
+        return 0
+
     def expand(self, parent):
+        level = self.expansion_level(parent)
+        # Try the most promising actions first
+        if self.use_prior and parent.priors is None:
+            actions = self.actor.get_actions(parent.pose)
+            _, valid_poses, rewards = self.evaluate_actions(actions, level)
+            parent.priors = self.heuristic_priors(valid_poses, rewards)
+            parent.unvisited_actions.sort(key=lambda idx: -parent.priors[idx])
         # Randomly select an action from the available actions
         action_idx = parent.unvisited_actions[0]
         del parent.unvisited_actions[0]
         action = self.actor.get_action(parent.pose, action_idx)
+        reward_map, occupancy_map = self.map_level(level)
 
         # Check whether this action is valid
-        ij = xy_to_ij(action[:, :2], self.extent, self.max_row, self.max_col)
+        ij = self.cell_indices(action[:, :2], level)
         is_inside_boundary = self.boundary_check(action)
-        is_outside_obstacle = self.collision_check(ij)
+        is_outside_obstacle = self.collision_check(ij, occupancy_map)
         is_valid_action = is_inside_boundary and is_outside_obstacle
 
         # Create the child node and attach it to its parent
         child = None
         if is_valid_action:
             pose = action[-1]
-            rewards = self.reward[ij[:, 0], ij[:, 1]]
-            reward = np.sum(rewards, axis=0)
-            child = Node(pose, self.num_actions, reward, action, parent)
+            if self.unique_cells:
+                reward, visited = self.path_reward(action, level,
+                                                   parent.visited)
+            else:
+                rewards = self.gather_rewards(reward_map, ij)
+                reward = np.sum(rewards, axis=0, dtype=self.dtype)
+            child = self.new_node(pose, reward, action, parent, action_idx)
+            if self.unique_cells:
+                child.visited = visited
+            if self.use_prior:
+                child.prior = parent.priors[action_idx]
             parent.add_child(child)
+            self.num_nodes += 1
+        else:
+            parent.invalid_actions.append(action_idx)
         return child
 
+    def expand_all(self, parent):
+        """
+        Expand all unvisited actions of a node at once.
+
+        The primitives are transformed, checked and scored with a handful of
+        array operations. Invalid actions are recorded in
+        `parent.invalid_actions` and never tried again.
+
+        :return: the new children
+        :rtype: list
+        """
+        action_indices = parent.unvisited_actions
+        parent.unvisited_actions = list()
+        actions = self.actor.get_actions(parent.pose, action_indices)
+        level = self.expansion_level(parent)
+
+        # Check which actions are valid
+        _, valid_poses, rewards = self.evaluate_actions(actions, level)
+        is_valid_action = np.all(valid_poses, axis=1)
+        # On the first visit all primitives are evaluated, so the priors
+        # come for free.
+        if self.use_prior and parent.priors is None:
+            parent.priors = np.zeros(self.num_actions)
+            parent.priors[action_indices] = self.heuristic_priors(
+                valid_poses, rewards)
+
+        # Create the valid children and attach them to their parent
+        children = []
+        for k, action_idx in enumerate(action_indices):
+            if not is_valid_action[k]:
+                parent.invalid_actions.append(action_idx)
+                continue
+            action = actions[k]
+            if self.unique_cells:
+                reward, visited = self.path_reward(action, level,
+                                                   parent.visited)
+            else:
+                reward = rewards[k]
+            child = self.new_node(action[-1], reward, action, parent,
+                                  action_idx)
+            if self.unique_cells:
+                child.visited = visited
+            if self.use_prior:
+                child.prior = parent.priors[action_idx]
+            parent.add_child(child)
+            children.append(child)
+        self.num_nodes += len(children)
+        return children
+
+    def gather_rewards(self, reward_map, ij):
+        rewards = reward_map[ij[:, 0], ij[:, 1]]
+        if self.objective_weights is not None:
+            rewards = rewards @ self.objective_weights
+        return rewards
+
+    def evaluate_actions(self, actions, level):
+        """
+        Check and score primitives transformed to a node's pose.
+
+        :param actions: actions of shape (num_actions, duration + 1, 3)
+        :type actions: numpy.ndarray
+        :return: cell indices of all poses, whether each pose is inside the
+            boundary and outside obstacles, and the reward sum of each action
+        :rtype: tuple
+        """
+        num_actions, num_poses = actions.shape[:2]
+        reward_map, occupancy_map = self.map_level(level)
+        x = actions[:, :, 0]
+        y = actions[:, :, 1]
+        is_inside_boundary = ((x > self.extent[0]) & (x < self.extent[1]) &
+                              (y > self.extent[2]) & (y < self.extent[3]))
+        ij = self.cell_indices(actions[:, :, :2].reshape(-1, 2), level)
+        occupied = occupancy_map[ij[:, 0], ij[:, 1]]
+        valid_poses = is_inside_boundary & ~occupied.reshape(
+            num_actions, num_poses)
+        rewards = self.gather_rewards(reward_map, ij)
+        rewards = rewards.reshape((num_actions, num_poses) + rewards.shape[1:])
+        rewards = np.sum(rewards, axis=1, dtype=self.dtype)
+        return ij, valid_poses, rewards
+
+    def heuristic_priors(self, valid_poses, rewards):
+        """
+        Prior probabilities of primitives from the reward ahead and the
+        clearance along them.
+
+        Reward sums (over all objectives) are rescaled by their largest
+        magnitude and passed through a softmax with temperature
+        `prior_temperature`. Each probability is then weighted by the
+        fraction of poses that are inside the boundary and outside
+        obstacles.
+        """
+        if rewards.ndim > 1:
+            rewards = np.sum(rewards, axis=1)
+        logits = rewards / (np.max(np.abs(rewards)) + self.eps)
+        logits = logits / self.prior_temperature
+        priors = np.exp(logits - np.max(logits))
+        priors *= np.mean(valid_poses, axis=1)
+        total = np.sum(priors)
+        if total == 0:
+            return np.full(len(priors), 1.0 / len(priors))
+        return priors / total
+
+    def path_reward(self, poses, level, visited):
+        """
+        Reward of the cells along `poses` that are not in `visited`.
+
+        Cells are identified by their flat index in the original map, and
+        rewards are looked up at the given pyramid level.
+
+        :param visited: sorted flat indices of the covered cells
+        :type visited: numpy.ndarray
+        :return: reward and sorted flat indices of all covered cells
+        :rtype: tuple
+        """
+        ij = self.cell_indices(poses[:, :2])
+        flat = ij[:, 0].astype(np.int64) * (self.max_col + 1) + ij[:, 1]
+        cells, first = np.unique(flat, return_index=True)
+        # Membership test by binary search in the sorted visited cells
+        positions = np.searchsorted(visited, cells)
+        is_new = positions == len(visited)
+        is_new[~is_new] = visited[positions[~is_new]] != cells[~is_new]
+        reward_map, _ = self.map_level(level)
+        if level == 0:
+            ij = ij[first[is_new]]
+        else:
+            ij = self.cell_indices(poses[first[is_new], :2], level)
+        reward = np.sum(self.gather_rewards(reward_map, ij),
+                        axis=0,
+                        dtype=self.dtype)
+        if np.any(is_new):
+            # Both arrays are sorted, so inserting keeps the order.
+            visited = np.insert(visited, positions[is_new], cells[is_new])
+        return reward, visited
+
+    def new_node(self, pose, reward=0.0, action=None, parent=None,
+                 action_idx=None):
+        """
+        Create a node, reusing the storage of a pruned node if possible.
+        """
+        if self.free_nodes:
+            node = self.free_nodes.pop()
+            node.__init__(pose, self.num_actions, reward, action, parent,
+                          action_idx)
+            return node
+        return Node(pose, self.num_actions, reward, action, parent,
+                    action_idx)
+
+    def prune(self):
+        """
+        Collapse the least-visited subtrees until the tree is small enough.
+
+        A collapsed node keeps its statistics, which already account for
+        every rollout of its subtree, and its pruned actions become
+        unvisited again. The removed nodes are recycled by `new_node`.
+        """
+        candidates = []
+        stack = list(self.root.children)
+        while stack:
+            node = stack.pop()
+            if node.children:
+                candidates.append(node)
+                stack.extend(node.children)
+        candidates.sort(key=lambda node: node.num_visits)
+        target = int(self.prune_ratio * self.max_nodes)
+        for node in candidates:
+            if self.num_nodes <= target:
+                break
+            # Nodes inside an already collapsed subtree are detached.
+            if node.parent is None:
+                continue
+            node.unvisited_actions.extend(
+                child.action_idx for child in node.children)
+            stack = node.children
+            node.children = list()
+            node.best_child = None
+            while stack:
+                removed = stack.pop()
+                stack.extend(removed.children)
+                removed.parent = None
+                removed.children = list()
+                self.num_nodes -= 1
+                self.num_pruned += 1
+                if len(self.free_nodes) < self.max_nodes:
+                    self.free_nodes.append(removed)
+
+    def invalidate_rollout_cache(self):
+        """
+        Forget all cached rollout values, e.g. after the maps were updated
+        in place. The map pyramid is rebuilt from the current maps as well.
+        """
+        if self.rollout_cache is not None:
+            self.rollout_cache.clear()
+        if self.pyramid is not None:
+            self.pyramid = MapPyramid(self.pyramid.reward_maps[0],
+                                      self.pyramid.occupancy_maps[0],
+                                      self.pyramid.num_levels,
+                                      self.pyramid_factor)
+
     def rollout(self, node):
+        key = None
+        if self.rollout_cache is not None:
+            # Changing the velocity rebuilds the primitives, which changes
+            # every rollout.
+            if (self.cached_rollout[0] is not self.actor.actions
+                    or self.cached_rollout[1] != self.max_rollout):
+                self.rollout_cache.clear()
+                self.cached_rollout = (self.actor.actions, self.max_rollout)
+            i, j = self.cell_indices(node.pose[None, :2])[0]
+            turns = node.pose[2] / (2 * np.pi) % 1.0
+            key = (int(i), int(j), int(turns * self.heading_bins))
+            average_reward = self.rollout_cache.get(key)
+            if average_reward is not None:
+                return average_reward
         # Default policy is moving forward
         action_idx = self.num_actions // 2
-        pose = copy(node.pose)
-        poses = []
-        for _ in range(self.max_rollout):
-            action = self.actor.get_action(pose, action_idx)
-            pose = action[-1]
-            poses.append(action)
-        poses = np.vstack(poses)
-        ij = xy_to_ij(poses[:, :2], self.extent, self.max_row, self.max_col)
-        rewards = self.reward[ij[:, 0], ij[:, 1]]
-        reward = np.sum(rewards, axis=0)
+        poses = self.actor.repeat_action(node.pose, action_idx,
+                                         self.max_rollout)
+        if self.unique_cells:
+            reward, _ = self.path_reward(poses, self.rollout_level,
+                                         node.visited)
+        else:
+            reward_map, _ = self.map_level(self.rollout_level)
+            ij = self.cell_indices(poses[:, :2], self.rollout_level)
+            rewards = self.gather_rewards(reward_map, ij)
+            reward = np.sum(rewards, axis=0, dtype=self.dtype)
         average_reward = reward / self.max_rollout
+        if key is not None:
+            self.rollout_cache.put(key, average_reward)
         return average_reward
 
     def backpropagation(self, node, reward):
         node.reward += reward
         node.num_visits += 1
         if node.parent is not None:
+            self.update_best_child(node.parent, node)
             self.backpropagation(node.parent, reward)
 
+    def child_score(self, child):
+        """
+        Score used to rank the children of a node.
+        """
+        if self.best_child_criterion == "visits":
+            return child.num_visits
+        return child.reward / child.num_visits
+
+    def update_best_child(self, parent, child):
+        """
+        Keep `parent.best_child` up to date after `child` was updated.
+
+        Only the updated child can overtake the current best child. If the
+        updated child is the best one, its score can only grow when ranking
+        by visits; its mean reward might drop, so the siblings are rescanned.
+        """
+        best = parent.best_child
+        if best is None:
+            parent.best_child = child
+        elif best is not child:
+            if self.child_score(child) > self.child_score(best):
+                parent.best_child = child
+        elif self.best_child_criterion == "value":
+            best_score = self.child_score(child)
+            for sibling in parent.children:
+                if sibling.num_visits == 0:
+                    continue
+                score = self.child_score(sibling)
+                if score > best_score:
+                    best, best_score = sibling, score
+            parent.best_child = best
+
     def best_action(self, node):
         assert len(node.unvisited_actions) == 0
         if not node.children:
@@ -186,17 +717,7 @@ class UCT:
                 "No valid action in current pose!\n"
                 "You might need to implement some 'turn around' engineering "
                 "tricks to solve this problem.")
-
-        ## Uncomment this block to use num_visits instead of expected reward
-        #  num_visits = [child.num_visits for child in node.children]
-        #  idx = np.argmax(num_visits)
-        #  best_child = node.children[idx]
-        #  print("Number of visits: ", num_visits)
-
-        values = [child.reward / child.num_visits for child in node.children]
-        index = np.argmax(values)
-        best_child = node.children[index]
-        return best_child.action
+        return node.best_child.action
 
     def get_trajectory(self, max_depth=None):
         assert len(self.root.unvisited_actions) == 0
@@ -206,16 +727,11 @@ class UCT:
                 "You might need to implement some 'turn around' engineering "
                 "tricks to solve this problem.")
         poses = []
-        node = copy(self.root)
+        node = self.root
         depth = 0
-        while node.children:
-            values = [
-                child.reward / child.num_visits for child in node.children
-            ]
-            idx = np.argmax(values)
-            best_child = node.children[idx]
-            poses.append(best_child.action)
-            node = best_child
+        while node.best_child is not None:
+            node = node.best_child
+            poses.append(node.action)
             depth += 1
             if max_depth is not None and depth == max_depth:
                 break
@@ -0,0 +1,58 @@
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Least-recently-used cache with a bounded total size.
+
+    :param max_size: maximum total size of the cached values
+    :type max_size: float
+    :param sizeof: size of a value, defaults to counting entries
+    :type sizeof: callable, optional
+    """
+
+    def __init__(self, max_size, sizeof=None):
+        assert max_size > 0
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def _sizeof(self, value):
+        return 1 if self.sizeof is None else self.sizeof(value)
+
+    def get(self, key, default=None):
+        value = self._items.get(key, self._items)
+        if value is self._items:
+            self.misses += 1
+            return default
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if key in self._items:
+            self.size -= self._sizeof(self._items.pop(key))
+        self._items[key] = value
+        self.size += self._sizeof(value)
+        # The newest entry is always kept, even if it exceeds the budget.
+        while self.size > self.max_size and len(self._items) > 1:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= self._sizeof(evicted)
+
+    def clear(self):
+        self._items.clear()
+        self.size = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,143 @@
+"""
+Hypervolume indicator of a set of points to be maximized.
+
+The hypervolume is the measure of the region dominated by the points and
+bounded below by a reference point. Exact sweeps are used for two and three
+objectives and a Monte-Carlo estimate for more.
+"""
+import numpy as np
+
+
+def dominated(points):
+    """
+    Whether each point is weakly dominated by another point.
+
+    Duplicated points dominate each other, so they are all flagged.
+    """
+    geq = np.all(points[None, :, :] >= points[:, None, :], axis=2)
+    np.fill_diagonal(geq, False)
+    return np.any(geq, axis=1)
+
+
+def hypervolume_2d(points, ref):
+    """
+    Area dominated by two-dimensional points, by a sweep along the x-axis.
+    """
+    points = np.maximum(np.asarray(points, dtype=float), ref)
+    if len(points) == 0:
+        return 0.0
+    order = np.argsort(-points[:, 0], kind="stable")
+    x = points[order, 0]
+    height = np.maximum.accumulate(points[order, 1]) - ref[1]
+    width = x - np.append(x[1:], ref[0])
+    return float(np.sum(width * height))
+
+
+def hypervolume_3d(points, ref):
+    """
+    Volume dominated by three-dimensional points, by a sweep along the
+    z-axis over two-dimensional slices.
+    """
+    points = np.maximum(np.asarray(points, dtype=float), ref)
+    order = np.argsort(-points[:, 2], kind="stable")
+    points = points[order]
+    z = np.append(points[:, 2], ref[2])
+    volume = 0.0
+    for idx in range(len(points)):
+        depth = z[idx] - z[idx + 1]
+        if depth > 0:
+            volume += depth * hypervolume_2d(points[:idx + 1, :2], ref[:2])
+    return volume
+
+
+def _samples(points, ref, num_samples, rng):
+    upper = np.max(points, axis=0)
+    rng = np.random if rng is None else rng
+    samples = ref + (upper - ref) * rng.random_sample(
+        (num_samples, points.shape[1]))
+    box = float(np.prod(upper - ref))
+    # covered[s, i] tells whether sample s is dominated by point i
+    covered = np.all(points[None, :, :] >= samples[:, None, :], axis=2)
+    return box, covered
+
+
+def hypervolume_mc(points, ref, num_samples=10000, rng=None):
+    """
+    Monte-Carlo estimate of the hypervolume for any number of objectives.
+    """
+    points = np.maximum(np.asarray(points, dtype=float), ref)
+    if len(points) == 0:
+        return 0.0
+    box, covered = _samples(points, ref, num_samples, rng)
+    return box * float(np.mean(np.any(covered, axis=1)))
+
+
+def hypervolume(points, ref, num_samples=10000, rng=None):
+    """
+    Hypervolume of `points` with respect to the reference point `ref`.
+
+    :param points: points of shape (num_points, num_objectives)
+    :type points: numpy.ndarray
+    :param ref: reference point of shape (num_objectives,)
+    :type ref: numpy.ndarray
+    :param num_samples: number of samples for more than three objectives
+    :type num_samples: int, optional
+    :param rng: random number generator for the Monte-Carlo estimate
+    :type rng: numpy.random.RandomState, optional
+    """
+    points = np.atleast_2d(points)
+    ref = np.asarray(ref, dtype=float)
+    if points.shape[1] == 1:
+        return float(max(np.max(points) - ref[0], 0.0))
+    if points.shape[1] == 2:
+        return hypervolume_2d(points, ref)
+    if points.shape[1] == 3:
+        return hypervolume_3d(points, ref)
+    return hypervolume_mc(points, ref, num_samples, rng)
+
+
+def hypervolume_contributions(points, ref, num_samples=10000, rng=None):
+    """
+    Hypervolume of the Pareto front lost by removing each point from it.
+
+    Dominated points are ignored and contribute nothing, and so do
+    duplicated points. The contributions are exact for up to three
+    objectives and estimated from one shared set of samples otherwise.
+
+    :return: contributions of shape (num_points,)
+    :rtype: numpy.ndarray
+    """
+    ref = np.asarray(ref, dtype=float)
+    points = np.maximum(np.atleast_2d(np.asarray(points, dtype=float)), ref)
+    # Duplicates share their region, so the contributions are computed for
+    # unique points and duplicated points get nothing.
+    points, inverse, multiplicity = np.unique(points,
+                                              axis=0,
+                                              return_inverse=True,
+                                              return_counts=True)
+    inverse = inverse.ravel()
+    num_points, num_objectives = points.shape
+    contributions = np.zeros(num_points)
+    front = np.flatnonzero(~dominated(points))
+    if num_objectives == 1:
+        contributions[front] = points[front, 0] - ref[0]
+    elif num_objectives == 2:
+        # Along the front, x decreases while y increases, so each point
+        # exclusively owns the rectangle up to its neighbours.
+        order = front[np.argsort(-points[front, 0])]
+        x = points[order, 0]
+        y = points[order, 1]
+        width = x - np.append(x[1:], ref[0])
+        height = y - np.append(ref[1], y[:-1])
+        contributions[order] = width * height
+    elif num_objectives == 3:
+        total = hypervolume_3d(points[front], ref)
+        for k, idx in enumerate(front):
+            others = np.delete(points[front], k, axis=0)
+            contributions[idx] = total - hypervolume_3d(others, ref)
+    else:
+        box, covered = _samples(points[front], ref, num_samples, rng)
+        exclusive = covered & (np.sum(covered, axis=1) == 1)[:, None]
+        contributions[front] = box * np.mean(exclusive, axis=0)
+    contributions[multiplicity > 1] = 0.0
+    return contributions[inverse]
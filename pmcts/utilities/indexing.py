@@ -1,7 +1,7 @@
 import numpy as np
 
 
-def xy_to_ij(xy, extent, max_row, max_col):
+def xy_to_ij(xy, extent, max_row, max_col, dtype=int):
     # x -> j
     j = (xy[:, 0] - extent[0]) / (extent[1] - extent[0]) * max_col
     j = np.round(j, decimals=6)
@@ -13,5 +13,5 @@ def xy_to_ij(xy, extent, max_row, max_col):
     i[i < 0] = 0
     i[i > max_row] = max_row
     # stack
-    ij = np.vstack([i.ravel(), j.ravel()]).T.astype(np.int)
+    ij = np.vstack([i.ravel(), j.ravel()]).T.astype(dtype)
     return ij
@@ -1,11 +1,12 @@
 import numpy as np
 
 
-def rotation(theta):
+def rotation(theta, dtype=None):
     return np.array(
         [
             [np.cos(theta), np.sin(theta), 0],
             [-np.sin(theta), np.cos(theta), 0],
             [0, 0, 1],
-        ]
+        ],
+        dtype=dtype,
     )
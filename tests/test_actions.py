@@ -57,3 +57,30 @@ def test_get_action():
                   np.sin(action[:, 2]))
     fig.tight_layout()
     plt.savefig('./tests/imgs/available_actions.png', bbox_inches='tight')
+
+
+def test_batch_actions():
+    """
+    Batched primitive transforms and repeated actions should match chained
+    calls to `get_action`, also after changing the velocity.
+    """
+    actor = DiscreteActions(angle_range=[-0.1, 0.1],
+                            num_actions=5,
+                            duration=10,
+                            velocity=1.0)
+    actor.velocity = 2.0
+    assert np.allclose(actor.actions[2, -1, :2], [20.0, 0.0])
+    pose = np.array([15.0, 5.0, np.pi / 2])
+    actions = actor.get_actions(pose)
+    for action_idx in range(5):
+        assert np.allclose(actions[action_idx],
+                           actor.get_action(pose, action_idx))
+    poses = actor.repeat_action(pose, 1, 3)
+    expected = []
+    for _ in range(3):
+        action = actor.get_action(pose, 1)
+        pose = action[-1]
+        expected.append(action)
+    expected = np.vstack(expected)
+    assert np.allclose(poses[:, :2], expected[:, :2])
+    assert np.allclose(np.cos(poses[:, 2]), np.cos(expected[:, 2]))
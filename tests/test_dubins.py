@@ -83,4 +83,23 @@ def test_steering():
     plt.savefig('./tests/imgs/right.png', bbox_inches='tight')
     
     print('Results are saved in /tests/imgs/')
-    
\ No newline at end of file
+    
+
+def test_steering_batch():
+    """
+    The batched closed form should match repeated calls to `steering`.
+    """
+    dubins = Dubins(velocity=1.5)
+    poses = np.array([[0.0, 0.0, 0.0], [3.0, -2.0, 2.0], [1.0, 5.0, 6.0]])
+    angles = np.array([-0.3, -1e-12, 0.0, 0.1, np.pi])
+    trajectories = dubins.steering_batch(poses, angles, 20)
+    assert trajectories.shape == (3, 5, 21, 3)
+    for n, pose in enumerate(poses):
+        for a, angle in enumerate(angles):
+            expected = [pose]
+            for _ in range(20):
+                expected.append(dubins.steering(expected[-1], angle))
+            trajectory = trajectories[n, a]
+            assert np.allclose(trajectory[:, :2], np.asarray(expected)[:, :2])
+            assert np.allclose(np.cos(trajectory[:, 2]),
+                               np.cos(np.asarray(expected)[:, 2]))
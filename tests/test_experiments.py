@@ -0,0 +1,52 @@
+"""
+Test scenarios and the experiment runner.
+"""
+import numpy as np
+from pmcts.experiments import (hotspots_scenario, random_scenario, run_sweep,
+                               load_results)
+
+
+def test_scenarios():
+    """
+    Generated scenarios should be normalized and keep the start pose free.
+    """
+    hotspots = hotspots_scenario()
+    assert hotspots.reward_map.shape == (100, 100)
+    assert hotspots.reward_map.min() == 0.0
+    scenario = random_scenario(0, num_objectives=2)
+    assert scenario.reward_map.shape == (100, 100, 2)
+    assert scenario.occupancy_map.dtype == bool
+    assert scenario.occupancy_map.any()
+    assert not scenario.occupancy_map[50, 50]
+    again = random_scenario(0, num_objectives=2)
+    assert np.array_equal(scenario.occupancy_map, again.occupancy_map)
+
+
+def test_run_sweep(tmp_path):
+    """
+    A sweep should write one row per planning step.
+    """
+    filename = str(tmp_path / "results.npz")
+    grid = {"weight": [0.1, 0.3], "max_iter": [50]}
+    scenarios = [hotspots_scenario(), random_scenario(1)]
+    columns = run_sweep(["uct"], grid, scenarios, num_steps=3,
+                        num_workers=2, filename=filename)
+    results = load_results(filename)
+    assert len(results["latency"]) == 2 * 2 * 3
+    for name in ["planner", "scenario", "weight", "max_iter", "step",
+                 "reward", "iterations", "iterations_per_second"]:
+        assert np.array_equal(results[name], columns[name])
+    assert np.all(results["iterations"] == 50)
+    assert np.all(results["latency"] > 0)
+
+
+def test_compare_planners():
+    """
+    Multi-objective planners should be comparable in the same sweep.
+    """
+    grid = {"max_iter": [30]}
+    scenarios = [random_scenario(2, num_objectives=2)]
+    columns = run_sweep(["puct", ("ensemble", {"num_workers": 0})], grid,
+                        scenarios, num_steps=2, num_workers=0)
+    assert list(columns["planner"]) == ["puct"] * 2 + ["ensemble"] * 2
+    assert np.all(columns["iterations"][2:] == 3 * 30)
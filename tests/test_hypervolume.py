@@ -0,0 +1,70 @@
+"""
+Test hypervolume routines.
+"""
+import numpy as np
+from pmcts.utilities.hypervolume import (hypervolume, hypervolume_mc,
+                                         hypervolume_contributions)
+
+
+def brute_force(points, ref, resolution=200):
+    """
+    Hypervolume counted on a regular grid of cell centers.
+    """
+    upper = points.max(axis=0)
+    axes = [
+        lo + (np.arange(resolution) + 0.5) * (hi - lo) / resolution
+        for lo, hi in zip(ref, upper)
+    ]
+    grid = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1)
+    grid = grid.reshape(-1, len(ref))
+    covered = np.zeros(len(grid), dtype=bool)
+    for point in points:
+        covered |= np.all(grid <= point, axis=1)
+    return covered.mean() * np.prod(upper - ref)
+
+
+def test_exact_hypervolume():
+    """
+    Sweeps should match a brute-force count for two and three objectives.
+    """
+    rng = np.random.RandomState(0)
+    for num_objectives, resolution in [(2, 1000), (3, 100)]:
+        points = rng.rand(6, num_objectives)
+        ref = np.zeros(num_objectives)
+        assert np.isclose(hypervolume(points, ref),
+                          brute_force(points, ref, resolution),
+                          rtol=0.02)
+    # Known value for a staircase front
+    points = np.array([[1.0, 3.0], [2.0, 2.0], [3.0, 1.0], [1.0, 1.0]])
+    assert np.isclose(hypervolume(points, np.zeros(2)), 6.0)
+
+
+def test_contributions():
+    """
+    Contributions should equal the loss of front hypervolume when a point
+    is removed, and the Monte-Carlo estimate should be close.
+    """
+    rng = np.random.RandomState(0)
+    for num_objectives in [2, 3]:
+        points = rng.rand(8, num_objectives)
+        points = np.vstack([points, points[:1]])  # duplicates contribute 0
+        ref = np.zeros(num_objectives)
+        front = [
+            idx for idx, point in enumerate(points)
+            if not any(np.all(other >= point) and np.any(other > point)
+                       for other in points)
+        ]
+        total = hypervolume(points, ref)
+        expected = np.zeros(len(points))
+        for idx in front:
+            others = [k for k in front if k != idx]
+            expected[idx] = total - hypervolume(points[others], ref)
+        contributions = hypervolume_contributions(points, ref)
+        assert np.allclose(contributions, expected)
+    points = rng.rand(6, 4)
+    ref = np.zeros(4)
+    estimate = hypervolume_mc(points, ref, 200000, rng)
+    assert np.isclose(estimate, brute_force(points, ref, 30), rtol=0.05)
+    contributions = hypervolume_contributions(points, ref, 200000, rng)
+    assert np.all(contributions >= 0)
+    assert np.sum(contributions) <= estimate
@@ -0,0 +1,125 @@
+"""
+Test map loading and representations.
+"""
+import numpy as np
+from pmcts.maps import (read_pgm, load_occupancy, save_reward_map,
+                        load_reward_map, MapPyramid, TiledMap)
+
+
+def write_pgm(filename, image):
+    header = b"P5\n# test map\n%d %d\n255\n" % (image.shape[1], image.shape[0])
+    with open(filename, "wb") as f:
+        f.write(header)
+        f.write(image.astype(np.uint8).tobytes())
+
+
+def test_read_pgm(tmp_path):
+    """
+    The memory-mapped image should match the raw pixels.
+    """
+    image = np.random.RandomState(0).randint(0, 256, size=(13, 21))
+    filename = str(tmp_path / "map.pgm")
+    write_pgm(filename, image)
+    data = read_pgm(filename)
+    assert isinstance(data, np.memmap)
+    assert np.array_equal(data, image)
+
+
+def test_load_occupancy(tmp_path):
+    """
+    The bit-packed occupancy should match the demos' dense thresholding,
+    both when built and when reloaded from the cache.
+    """
+    image = np.random.RandomState(0).randint(0, 256, size=(13, 21))
+    filename = str(tmp_path / "map.pgm")
+    write_pgm(filename, image)
+    expected = (image - image.min()) / image.max() < 0.9
+    cache = str(tmp_path / "map.npy")
+    for _ in range(2):
+        occupancy = load_occupancy(filename, 0.9, cache=cache, chunk_rows=4)
+        assert occupancy.dtype == bool
+        assert occupancy.shape == expected.shape
+        assert np.array_equal(np.asarray(occupancy), expected)
+        i, j = np.nonzero(np.ones_like(expected))
+        assert np.array_equal(occupancy[i, j], expected[i, j])
+        assert np.array_equal(occupancy[3], expected[3])
+    # A different threshold must not reuse the cache.
+    occupancy = load_occupancy(filename, 0.2, cache=cache)
+    expected = (image - image.min()) / image.max() < 0.2
+    assert np.array_equal(np.asarray(occupancy), expected)
+    occupancy = load_occupancy(filename, 0.9, cache=cache)
+    expected = (image - image.min()) / image.max() < 0.9
+    assert np.array_equal(np.asarray(occupancy), expected)
+
+
+def test_reward_map_cache(tmp_path):
+    """
+    A saved reward map should be reopened as a memory map.
+    """
+    reward_map = np.random.RandomState(0).rand(13, 21, 2)
+    filename = str(tmp_path / "reward.npy")
+    save_reward_map(reward_map, filename, chunk_rows=4)
+    loaded = load_reward_map(filename)
+    assert isinstance(loaded, np.memmap)
+    assert loaded.dtype == np.float32
+    assert np.allclose(loaded, reward_map)
+
+
+def test_pyramid():
+    """
+    Coarse levels should average rewards and OR occupancy block-wise,
+    including the partial blocks at the borders.
+    """
+    rng = np.random.RandomState(0)
+    reward_map = rng.rand(13, 21, 2)
+    occupancy_map = rng.rand(13, 21) > 0.95
+    pyramid = MapPyramid(reward_map, occupancy_map, 3, chunk_rows=2)
+    assert pyramid.num_levels == 3
+    for level, factor in [(1, 2), (2, 4)]:
+        reward, occupancy = pyramid.level(level)
+        assert occupancy.shape == (-(-13 // factor), -(-21 // factor))
+        assert reward.shape == occupancy.shape + (2,)
+        for i, j in [(0, 0), (1, 2), (occupancy.shape[0] - 1,
+                                      occupancy.shape[1] - 1)]:
+            rows = slice(i * factor, (i + 1) * factor)
+            cols = slice(j * factor, (j + 1) * factor)
+            assert np.allclose(reward[i, j],
+                               reward_map[rows, cols].mean(axis=(0, 1)))
+            assert occupancy[i, j] == occupancy_map[rows, cols].any()
+
+
+def test_tiled_map(tmp_path):
+    """
+    A tiled map should behave like the dense map while keeping the
+    resident tiles within the memory budget.
+    """
+    rng = np.random.RandomState(0)
+    reward_map = rng.rand(50, 70, 2)
+    tile_bytes = 16 * 16 * 2 * 8
+    tiled = TiledMap.from_array(reward_map, str(tmp_path), 16,
+                                memory_budget=3 * tile_bytes)
+    assert tiled.shape == reward_map.shape
+    assert tiled.dtype == reward_map.dtype
+    i = rng.randint(0, 50, size=200)
+    j = rng.randint(0, 70, size=200)
+    assert np.array_equal(tiled[i, j], reward_map[i, j])
+    assert tiled.tiles.size <= 3 * tile_bytes
+    assert np.array_equal(tiled[10:40], reward_map[10:40])
+    assert np.array_equal(tiled[5, 3:9], reward_map[5, 3:9])
+    assert np.array_equal(np.asarray(tiled), reward_map)
+
+
+def test_tiled_planning(tmp_path):
+    """
+    Planning on tiled maps should give the same action as on dense maps.
+    """
+    from test_uct import make_maps, make_planner
+    reward_map, occupancy_map = make_maps()
+    tiled_reward = TiledMap.from_array(reward_map, str(tmp_path / "reward"),
+                                       32)
+    tiled_occupancy = TiledMap.from_array(occupancy_map,
+                                          str(tmp_path / "occupancy"), 32)
+    pose = np.array([50.0, 20.0, np.pi / 2])
+    expected = make_planner().search(pose.copy(), reward_map, occupancy_map)
+    action = make_planner().search(pose.copy(), tiled_reward, tiled_occupancy)
+    assert np.allclose(action, expected)
@@ -0,0 +1,467 @@
+"""
+Test UCT and ParetoUCT planners.
+"""
+import os
+import numpy as np
+from pmcts.planners import UCT, ParetoUCT
+
+
+def make_maps(num_objectives=None):
+    """
+    Reward increasing towards the upper-right corner and a wall of obstacles.
+    """
+    i, j = np.mgrid[0:100, 0:100]
+    reward_map = (i * j / 99**2).astype(np.float32)
+    if num_objectives is not None:
+        reward_map = np.dstack([reward_map, (i**2 / 99**2)] +
+                               [reward_map] * (num_objectives - 2))
+    occupancy_map = np.zeros((100, 100), dtype=bool)
+    occupancy_map[40:45, 20:60] = True
+    return reward_map, occupancy_map
+
+
+def make_planner(cls=UCT, **kwargs):
+    params = dict(extent=[0, 100, 0, 100],
+                  angle_range=[-0.1, 0.1],
+                  velocity=1.0,
+                  num_actions=5,
+                  duration=10,
+                  weight=0.3,
+                  max_iter=200,
+                  max_rollout=5)
+    params.update(kwargs)
+    return cls(**params)
+
+
+def test_search():
+    """
+    Search should return a valid primitive starting at the robot's pose.
+    """
+    reward_map, occupancy_map = make_maps()
+    pose = np.array([50.0, 20.0, np.pi / 2])
+    uct = make_planner()
+    action = uct.search(pose, reward_map, occupancy_map)
+    assert action.shape == (11, 3)
+    assert np.allclose(action[0], pose)
+    assert uct.get_trajectory().shape[1] == 3
+
+
+def test_coarse_levels():
+    """
+    Rollouts and deep expansions at coarse levels should reuse one pyramid
+    per map.
+    """
+    reward_map, occupancy_map = make_maps()
+    pose = np.array([50.0, 20.0, np.pi / 2])
+    uct = make_planner(rollout_level=2, expand_level=1, coarse_expand_depth=2)
+    action = uct.search(pose, reward_map, occupancy_map)
+    assert action.shape == (11, 3)
+    pyramid = uct.pyramid
+    assert pyramid.num_levels == 3
+    uct.search(pose, reward_map, occupancy_map)
+    assert uct.pyramid is pyramid
+
+
+def test_coarse_collision_check():
+    """
+    Expansions at a coarse level should never pass through an obstacle of
+    the original map.
+    """
+    reward_map, _ = make_maps()
+    occupancy_map = np.zeros((100, 100), dtype=bool)
+    occupancy_map[:, 50] = True
+    for expand_level in [1, 2]:
+        for x in np.linspace(36.0, 42.0, 7):
+            uct = make_planner(expand_level=expand_level,
+                               coarse_expand_depth=0,
+                               max_iter=50)
+            pose = np.array([x, 50.0, 0.0])
+            uct.search(pose, reward_map, occupancy_map)
+            nodes = [uct.root]
+            while nodes:
+                node = nodes.pop()
+                nodes.extend(node.children)
+                if node.action is not None:
+                    ij = uct.cell_indices(node.action[:, :2])
+                    assert not np.any(occupancy_map[ij[:, 0], ij[:, 1]])
+
+
+def test_early_termination():
+    """
+    Stopping rules should end the search early and report the saved
+    iterations.
+    """
+    reward_map, occupancy_map = make_maps()
+    pose = np.array([50.0, 20.0, np.pi / 2])
+    full = make_planner(max_iter=1000)
+    full.search(pose.copy(), reward_map, occupancy_map)
+    assert full.num_iterations == 1000
+    assert full.iterations_saved == 0
+    uct = make_planner(max_iter=1000, stopping_rule="confidence")
+    uct.search(pose.copy(), reward_map, occupancy_map)
+    assert uct.num_iterations + uct.iterations_saved == 1000
+
+    # The "visits" rule must return the action of the full search, also
+    # where the most visited child is not the one with the best mean.
+    try:
+        make_planner(stopping_rule="visits")
+    except AssertionError:
+        pass
+    else:
+        raise AssertionError("The visits rule needs the visits criterion")
+    poses = [pose, np.array([79.08, 69.77, 3.495])]
+    for pose, max_iter in zip(poses, [1000, 600]):
+        for expansion in ["single", "batch"]:
+            params = dict(max_iter=max_iter,
+                          expansion=expansion,
+                          best_child_criterion="visits")
+            expected = make_planner(**params).search(pose.copy(), reward_map,
+                                                     occupancy_map)
+            uct = make_planner(stopping_rule="visits", **params)
+            action = uct.search(pose.copy(), reward_map, occupancy_map)
+            assert np.allclose(action, expected)
+            assert uct.num_iterations + uct.iterations_saved == max_iter
+            assert uct.iterations_saved > 0
+            # Batch expansion backs up several visits per iteration.
+            scale = 5 if expansion == "batch" else 1
+            visits = sorted(child.num_visits for child in uct.root.children)
+            assert visits[-1] - visits[-2] > scale * uct.iterations_saved
+
+    reward_map, occupancy_map = make_maps(num_objectives=2)
+    puct = make_planner(ParetoUCT, max_iter=1000, stopping_rule="pareto")
+    puct.search(pose.copy(), reward_map, occupancy_map)
+    assert puct.iterations_saved > 0
+
+
+def test_hypervolume_selection():
+    """
+    Hypervolume-guided selection should work for two and four objectives.
+    """
+    np.random.seed(0)
+    pose = np.array([50.0, 20.0, np.pi / 2])
+    for num_objectives in [2, 4]:
+        reward_map, occupancy_map = make_maps(num_objectives)
+        puct = make_planner(ParetoUCT, selection="hypervolume",
+                            num_samples=1000)
+        action = puct.search(pose.copy(), reward_map, occupancy_map)
+        assert action.shape == (11, 3)
+
+
+def test_node_budget():
+    """
+    Pruning should keep the tree within the node budget.
+    """
+    reward_map, occupancy_map = make_maps()
+    pose = np.array([50.0, 20.0, np.pi / 2])
+
+    def count(node):
+        return 1 + sum(count(child) for child in node.children)
+
+    uct = make_planner(max_iter=1000, max_nodes=100)
+    action = uct.search(pose.copy(), reward_map, occupancy_map)
+    assert action.shape == (11, 3)
+    assert uct.num_pruned > 0
+    assert count(uct.root) == uct.num_nodes <= 100
+    assert uct.root.num_visits == sum(
+        child.num_visits for child in uct.root.children)
+    # The root and its five children can never be pruned.
+    try:
+        make_planner(max_nodes=7)
+    except AssertionError:
+        pass
+    else:
+        raise AssertionError("A budget below the root's children was accepted")
+    uct = make_planner(max_nodes=8, prune_ratio=0.75)
+    uct.search(pose.copy(), reward_map, occupancy_map)
+    assert count(uct.root) == uct.num_nodes <= 8
+
+
+def test_best_child():
+    """
+    Best-child pointers should agree with a full scan of the children.
+    """
+    reward_map, occupancy_map = make_maps()
+    pose = np.array([50.0, 20.0, np.pi / 2])
+    for criterion in ["value", "visits"]:
+        uct = make_planner(best_child_criterion=criterion, max_nodes=150)
+        action = uct.search(pose.copy(), reward_map, occupancy_map)
+        stack = [uct.root]
+        while stack:
+            node = stack.pop()
+            stack.extend(node.children)
+            if not node.children:
+                assert node.best_child is None
+                continue
+            scores = [uct.child_score(child) for child in node.children]
+            assert uct.child_score(node.best_child) == max(scores)
+        values = [
+            child.num_visits if criterion == "visits" else child.reward /
+            child.num_visits for child in uct.root.children
+        ]
+        assert action is uct.root.children[np.argmax(values)].action
+
+
+def test_unique_cells():
+    """
+    With path-dependent rewards, cells covered once are not rewarded again.
+    """
+    reward_map, occupancy_map = make_maps()
+    reward_map = np.ones_like(reward_map)
+    pose = np.array([50.0, 20.0, np.pi / 2])
+    uct = make_planner(unique_cells=True)
+    uct.search(pose.copy(), reward_map, occupancy_map)
+    action = uct.actor.get_action(pose, 2)
+    ij = uct.cell_indices(action[:, :2])
+    num_cells = len(np.unique(ij[:, 0] * 100 + ij[:, 1]))
+    reward, visited = uct.path_reward(action, 0, uct.root.visited)
+    assert reward == num_cells
+    assert np.all(np.diff(visited) > 0)
+    reward, visited_again = uct.path_reward(action, 0, visited)
+    assert reward == 0
+    assert np.array_equal(visited, visited_again)
+    for child in uct.root.children:
+        ij = uct.cell_indices(child.action[:, :2])
+        cells = np.unique(ij[:, 0] * 100 + ij[:, 1])
+        assert np.array_equal(child.visited, cells)
+        for grandchild in child.children:
+            assert np.all(np.isin(child.visited, grandchild.visited))
+
+
+def test_batch_expansion():
+    """
+    Expanding all primitives at once should create the same children as
+    expanding them one by one, and record the invalid ones.
+    """
+    from pmcts.planners import Node
+    reward_map, occupancy_map = make_maps()
+    uct = make_planner(expansion="batch")
+    pose = np.array([18.0, 33.0, np.pi / 2])
+    action = uct.search(pose.copy(), reward_map, occupancy_map)
+    assert action.shape == (11, 3)
+    single = Node(pose, 5)
+    batch = Node(pose, 5)
+    expected = [uct.expand(single) for _ in range(5)]
+    children = uct.expand_all(batch)
+    assert single.invalid_actions == batch.invalid_actions
+    assert 0 < len(batch.invalid_actions) < 5
+    assert not batch.unvisited_actions
+    expected = [child for child in expected if child is not None]
+    assert len(children) == len(expected)
+    for child, other in zip(children, expected):
+        assert child.action_idx == other.action_idx
+        assert np.allclose(child.action, other.action)
+        assert np.allclose(child.reward, other.reward)
+
+
+def test_float32():
+    """
+    A float32 planner should keep its buffers in float32 and make nearly
+    the same decision as a float64 planner.
+    """
+    reward_map, occupancy_map = make_maps()
+    pose = np.array([50.0, 20.0, np.pi / 2])
+    uct64 = make_planner(max_iter=500)
+    uct32 = make_planner(max_iter=500, dtype=np.float32)
+    uct64.search(pose.copy(), reward_map, occupancy_map)
+    action = uct32.search(pose.copy(), reward_map, occupancy_map)
+    assert action.dtype == np.float32
+    assert uct32.actor.actions.dtype == np.float32
+    assert uct32.cell_indices(action[:, :2]).dtype == np.int32
+    for child in uct32.root.children:
+        assert child.reward.dtype == np.float32
+        assert child.pose.dtype == np.float32
+    # The chosen action must be within 1% of the best float64 value.
+    values64 = {
+        child.action_idx: child.reward / child.num_visits
+        for child in uct64.root.children
+    }
+    chosen = uct32.root.best_child.action_idx
+    best = max(values64.values())
+    assert values64[chosen] >= best - 0.01 * abs(best)
+
+
+def test_priors():
+    """
+    Priors should be a distribution favouring clear, rewarding primitives,
+    order the expansions, and agree between single and batch expansion.
+    """
+    from pmcts.planners import Node
+    reward_map, occupancy_map = make_maps()
+    pose = np.array([18.0, 33.0, np.pi / 2])
+    for expansion in ["single", "batch"]:
+        uct = make_planner(use_prior=True, expansion=expansion)
+        action = uct.search(pose.copy(), reward_map, occupancy_map)
+        assert action.shape == (11, 3)
+    single = Node(pose, 5)
+    batch = Node(pose, 5)
+    first = uct.expand(single)
+    uct.expand_all(batch)
+    assert np.allclose(single.priors, batch.priors)
+    assert np.isclose(np.sum(single.priors), 1.0)
+    assert first.action_idx == np.argmax(single.priors)
+    assert list(single.priors[single.unvisited_actions]) == sorted(
+        single.priors[single.unvisited_actions], reverse=True)
+    # Primitives running into the wall get lower priors.
+    for idx in batch.invalid_actions:
+        assert batch.priors[idx] < batch.priors[first.action_idx]
+    for child in batch.children:
+        assert child.prior == batch.priors[child.action_idx]
+
+
+def test_scalarized_ensemble():
+    """
+    Scalarized searches should match UCT on the weighted map, and the
+    ensemble should return a non-dominated action.
+    """
+    from pmcts.planners import ScalarizedEnsemble
+    reward_map, occupancy_map = make_maps(num_objectives=2)
+    pose = np.array([50.0, 20.0, np.pi / 2])
+    weights = np.array([0.3, 0.7])
+    expected = make_planner().search(pose.copy(), reward_map @ weights,
+                                     occupancy_map)
+    action = make_planner(objective_weights=weights).search(
+        pose.copy(), reward_map, occupancy_map)
+    assert np.allclose(action, expected)
+    for num_workers in [0, 2]:
+        with make_planner(ScalarizedEnsemble, max_iter=100,
+                          num_workers=num_workers) as ensemble:
+            action = ensemble.search(pose.copy(), reward_map, occupancy_map)
+            ensemble.search(pose.copy(), reward_map, occupancy_map)
+            assert ensemble.num_iterations == 3 * 100
+        assert any(
+            np.allclose(action, other) for other in ensemble.pareto_actions)
+        values = np.asarray(ensemble.pareto_values)
+        for value in values:
+            assert not np.any(
+                np.all(values >= value, axis=1) & np.any(values > value,
+                                                          axis=1))
+
+
+def test_ensemble_shared_maps(tmp_path):
+    """
+    Tiled and bit-packed maps should be shared without being expanded, and
+    workers should only keep the maps of their latest job.
+    """
+    from pmcts.maps import PackedOccupancy, TiledMap
+    from pmcts.planners import ScalarizedEnsemble, ensemble as module
+    reward_map, occupancy_map = make_maps(num_objectives=2)
+    pose = np.array([50.0, 20.0, np.pi / 2])
+    tiled_reward = TiledMap.from_array(reward_map, str(tmp_path / "reward"),
+                                       32)
+    packed_occupancy = PackedOccupancy(np.packbits(occupancy_map, axis=1),
+                                       occupancy_map.shape[1])
+    with make_planner(ScalarizedEnsemble, max_iter=100,
+                      num_workers=0) as ensemble:
+        expected = ensemble.search(pose.copy(), reward_map, occupancy_map)
+    with make_planner(ScalarizedEnsemble, max_iter=100,
+                      num_workers=2) as ensemble:
+        action = ensemble.search(pose.copy(), tiled_reward, packed_occupancy)
+        reward_shared, occupancy_shared = ensemble.shared_maps[2]
+        assert reward_shared[:2] == ("tiled", tiled_reward.directory)
+        assert occupancy_shared[0] == "packed"
+        assert occupancy_shared[2] == occupancy_map.shape[1]
+        assert np.load(occupancy_shared[1]).shape == (100, 13)
+
+        job = (ensemble.params, np.array([1.0, 0.0]), pose.copy())
+        module._scalarized_search(job + (reward_shared, occupancy_shared))
+        other_reward = ("npy", str(tmp_path / "reward.npy"))
+        np.save(other_reward[1], reward_map)
+        module._scalarized_search(job + (other_reward, occupancy_shared))
+        assert set(module._shared_maps) == {other_reward, occupancy_shared}
+    assert np.allclose(action, expected)
+
+    # Files written for replaced maps are deleted, passed-in files are kept.
+    with make_planner(ScalarizedEnsemble, num_workers=2) as ensemble:
+        first = ensemble.share_maps(reward_map, occupancy_map)
+        second = ensemble.share_maps(reward_map.copy(), occupancy_map)
+        assert not os.path.exists(first[0][1])
+        assert os.path.exists(second[0][1])
+        assert second[1] == first[1] and os.path.exists(first[1][1])
+        mapped = np.load(other_reward[1], mmap_mode="r")
+        third = ensemble.share_maps(mapped, occupancy_map)
+        assert third[0] == other_reward
+        assert not os.path.exists(second[0][1])
+        ensemble.share_maps(reward_map, occupancy_map)
+        assert os.path.exists(other_reward[1])
+
+
+def test_rollout_cache():
+    """
+    Cached rollouts should be reused across searches and dropped when the
+    map changes.
+    """
+    reward_map, occupancy_map = make_maps(num_objectives=2)
+    pose = np.array([50.0, 20.0, np.pi / 2])
+    puct = make_planner(ParetoUCT, rollout_cache_size=50)
+    puct.search(pose.copy(), reward_map, occupancy_map)
+    cache = puct.rollout_cache
+    assert 0 < len(cache) <= 50
+    misses = cache.misses
+    puct.search(pose.copy(), reward_map, occupancy_map)
+    assert cache.hits > 0
+    assert 0.0 < cache.hit_rate < 1.0
+    for value in cache._items.values():
+        assert value.shape == (2,)
+    cache.hits = cache.misses = 0
+    puct.search(pose.copy(), reward_map.copy(), occupancy_map)
+    assert cache.misses >= min(misses, 50)
+
+    # Maps edited in place are picked up after invalidating, also by the
+    # coarse rollouts.
+    reward_map, occupancy_map = make_maps()
+    uct = make_planner(rollout_cache_size=50, rollout_level=1)
+    uct.search(pose.copy(), reward_map, occupancy_map)
+    assert uct.rollout(uct.root) > 0
+    reward_map[:] = 0
+    uct.invalidate_rollout_cache()
+    assert uct.rollout(uct.root) == 0
+
+    # New primitives or rollout lengths are not served from the cache.
+    reward_map, occupancy_map = make_maps()
+    uct = make_planner(rollout_cache_size=50)
+    uct.search(pose.copy(), reward_map, occupancy_map)
+    for velocity, max_rollout in [(2.0, 5), (2.0, 3)]:
+        uct.actor.velocity = velocity
+        uct.max_rollout = max_rollout
+        cached = uct.rollout(uct.root)
+        uct.invalidate_rollout_cache()
+        assert cached == uct.rollout(uct.root)
+
+
+def test_select_kernels():
+    """
+    The plain-Python and the NumPy selection kernels should agree, with and
+    without priors and in both precisions.
+    """
+    pose = np.array([50.0, 20.0, np.pi / 2])
+    for dtype in [np.float64, np.float32]:
+        reward_map, occupancy_map = make_maps()
+        for use_prior in [False, True]:
+            trajectories = []
+            for threshold in [0, 100]:
+                np.random.seed(0)
+                uct = make_planner(fast_select_threshold=threshold,
+                                   use_prior=use_prior,
+                                   dtype=dtype)
+                uct.search(pose.copy(), reward_map, occupancy_map)
+                trajectories.append(uct.get_trajectory())
+            assert np.allclose(trajectories[0], trajectories[1])
+
+        reward_map, occupancy_map = make_maps(num_objectives=3)
+        for use_prior in [False, True]:
+            puct = make_planner(ParetoUCT, use_prior=use_prior, dtype=dtype)
+            puct.search(pose.copy(), reward_map, occupancy_map)
+            nodes = [puct.root]
+            while nodes:
+                node = nodes.pop()
+                nodes.extend(node.children)
+                if node.unvisited_actions or not node.children:
+                    continue
+                front = puct.pareto_front_scalar(node)
+                assert front
+                assert front == puct.pareto_front_vectorized(node)
+
+    # NumPy scalars as parameters, e.g. taken from a sweep array
+    puct = make_planner(ParetoUCT, weight=np.float32(0.3))
+    action = puct.search(pose.copy(), reward_map, occupancy_map)
+    assert action.shape == (11, 3)